@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BENCHMARK MARKET PRICE
+Mede o MarketPriceScraper.run contra o stand-in local (sem rede)
+
+Ex:
+    python benchmark_market_price.py --workers 4 --rate 50 --latency 0.05
+    python benchmark_market_price.py --smoke
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from contextlib import redirect_stdout
+from typing import Dict, List
+
+from replay_transport import FIPE_PREFIX, REPLAY_SUPABASE_URL, FixtureAnalyzer, ReplayAdapter
+
+
+DEFAULT_FIXTURES = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    'fixtures',
+    'fipe_replay.json'
+)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por nearest-rank"""
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def run_benchmark(
+    fixtures_path: str = DEFAULT_FIXTURES,
+    workers: int = 1,
+    rate: float = 2.0,
+    burst: int = 2,
+    grouped: bool = False,
+    latency: float = 0.0,
+    throttle_rate: float = 0.0,
+    max_batches: int = 10,
+    batch_size: int = 50,
+    quiet: bool = True
+) -> Dict:
+    """Executa o scraper contra o ReplayAdapter e retorna as métricas"""
+    with open(fixtures_path, encoding='utf-8') as f:
+        fixtures = json.load(f)
+
+    vehicles = fixtures.pop('veiculos', [])
+
+    adapter = ReplayAdapter(
+        fixtures,
+        vehicles=[dict(v) for v in vehicles],
+        latency=latency,
+        throttle_rate=throttle_rate
+    )
+
+    # Clientes apontando para o stand-in, com cache FIPE, journal, histórico e métricas isolados
+    cache_dir = tempfile.mkdtemp(prefix='fipe_bench_')
+    os.environ['SUPABASE_URL'] = REPLAY_SUPABASE_URL
+    os.environ['SUPABASE_SERVICE_ROLE_KEY'] = 'replay'
+    os.environ['FIPE_CACHE_PATH'] = os.path.join(cache_dir, 'fipe_cache.sqlite3')
+    os.environ['MARKET_PRICE_JOURNAL_PATH'] = os.path.join(cache_dir, 'market_price_journal.jsonl')
+    os.environ['FIPE_HISTORY_DIR'] = os.path.join(cache_dir, 'fipe_history')
+    os.environ['MARKET_PRICE_METRICS_DIR'] = os.path.join(cache_dir, 'metrics')
+
+    from market_price_vehicles_scraper import MarketPriceScraper
+
+    scraper = MarketPriceScraper(
+        workers=workers,
+        rate=rate,
+        burst=burst,
+        grouped=grouped,
+        analyzer=FixtureAnalyzer(fixtures)
+    )
+    scraper.fipe.session.mount(FIPE_PREFIX, adapter)
+    scraper.db_client.session.mount(REPLAY_SUPABASE_URL, adapter)
+
+    output = io.StringIO()
+    start = time.perf_counter()
+
+    if quiet:
+        with redirect_stdout(output):
+            scraper.run(max_batches=max_batches, batch_size=batch_size)
+    else:
+        scraper.run(max_batches=max_batches, batch_size=batch_size)
+
+    elapsed = time.perf_counter() - start
+    scraper.close()
+
+    processed = scraper.stats['processed']
+    fipe_requests = sum(n for k, n in adapter.requests.items() if k.startswith('fipe:'))
+    supabase_requests = sum(n for k, n in adapter.requests.items() if k.startswith('supabase:'))
+
+    return {
+        'vehicles': processed,
+        'priced': scraper.stats['success'],
+        'not_found': scraper.stats['not_found'],
+        'errors': scraper.stats['errors'],
+        'elapsed_s': round(elapsed, 3),
+        'vehicles_per_s': round(processed / elapsed, 2) if elapsed > 0 else 0,
+        'fipe_requests': fipe_requests,
+        'fipe_requests_per_vehicle': round(fipe_requests / processed, 2) if processed else 0,
+        'supabase_requests': supabase_requests,
+        'fipe_latency_ms': {
+            'p50': round(percentile(adapter.latencies['fipe'], 50) * 1000, 2),
+            'p99': round(percentile(adapter.latencies['fipe'], 99) * 1000, 2),
+        },
+        'supabase_latency_ms': {
+            'p50': round(percentile(adapter.latencies['supabase'], 50) * 1000, 2),
+            'p99': round(percentile(adapter.latencies['supabase'], 99) * 1000, 2),
+        },
+        'requests': adapter.requests,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark offline do MarketPriceScraper")
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--rate', type=float, default=50.0, help="Requests/s na FIPE")
+    parser.add_argument('--burst', type=int, default=10)
+    parser.add_argument('--grouped', action='store_true')
+    parser.add_argument('--latency', type=float, default=0.02, help="Latência simulada (s)")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Probabilidade de 429")
+    parser.add_argument('--max-batches', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--verbose', action='store_true', help="Mostra o log do scraper")
+    parser.add_argument('--output', help="Grava o resultado em JSON")
+    parser.add_argument('--smoke', action='store_true', help="Execução rápida; falha se nada for precificado")
+    args = parser.parse_args()
+
+    if args.smoke:
+        args.latency = 0.0
+        args.max_batches = 2
+        args.batch_size = 20
+
+    result = run_benchmark(
+        fixtures_path=args.fixtures,
+        workers=args.workers,
+        rate=args.rate,
+        burst=args.burst,
+        grouped=args.grouped,
+        latency=args.latency,
+        throttle_rate=args.throttle_rate,
+        max_batches=args.max_batches,
+        batch_size=args.batch_size,
+        quiet=not args.verbose
+    )
+
+    print("="*60)
+    print("📈 BENCHMARK MARKET PRICE")
+    print("="*60)
+    print(f"   • Veículos: {result['vehicles']} ({result['priced']} com preço)")
+    print(f"   • Tempo: {result['elapsed_s']}s")
+    print(f"   • Veículos/s: {result['vehicles_per_s']}")
+    print(f"   • Requests FIPE/veículo: {result['fipe_requests_per_vehicle']}")
+    print(f"   • Requests Supabase: {result['supabase_requests']}")
+    print(f"   • Latência FIPE p50/p99: {result['fipe_latency_ms']['p50']}/{result['fipe_latency_ms']['p99']} ms")
+    print(f"   • Latência Supabase p50/p99: {result['supabase_latency_ms']['p50']}/{result['supabase_latency_ms']['p99']} ms")
+    print("="*60)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+    if args.smoke and (not result['priced'] or result['errors']):
+        print("❌ Smoke test falhou")
+        sys.exit(1)
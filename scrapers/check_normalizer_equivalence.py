@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CHECK NORMALIZER EQUIVALENCE
+Compara a cadeia sequencial original de regras do FIPESmartSearcher
+(um pattern.sub por regra, na ordem) com o despacho por RegexRuleChain
+
+Ex:
+    python check_normalizer_equivalence.py
+    python check_normalizer_equivalence.py --corpus titulos.txt
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+from typing import List
+
+from vehicle_analyzer import FIPESmartSearcher, RegexRuleChain
+
+
+DEFAULT_FIXTURES = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    'fixtures',
+    'fipe_replay.json'
+)
+
+# Tokens que exercitam as regras (e combinações entre elas)
+TOKENS = [
+    'CB300F', 'CB 300', 'CB 500F', 'CG160', 'CG 160', 'BIZ125', 'BIZ 125', 'POP110I', 'POP 100',
+    'FAN160', 'FAN 125', 'YBR150', 'YBR 125', 'YS250', 'FZ25', 'MT-03', 'MT 07', 'MT09', 'XTZ250',
+    'Z400', 'Z 900', 'KA SE', 'KA', 'ECOSPORT SE', 'ONIX 10MT', 'CORSA HATCH', 'CORSA SEDAN',
+    'HILUX SRV', 'HILUX CD', 'RANGER XLTD', 'S10 LTZ', 'S10 HIGH', 'STRADA HD', 'STRADA ENDURANCE',
+    'TITAN', 'FACTOR', 'ED', 'TWISTER', 'START', 'UNO', 'VIVACE', 'GOL', 'ACCELO', 'INTRUDER',
+    '1.0', '1.6L', '2.0B', '2.8', 'AT', 'MT', 'CVT', 'AUT', 'MAN', 'MANUAL', 'AUTOMATICO',
+    '4X2', '4X4', '6X2', '6X4', 'FLEX', 'GAS', 'DIESEL', 'GASOLINA', 'ABS', 'CBS', 'EBS',
+    'CD', 'CS', 'CE', 'CABINE', 'DUPLA', 'SIMPLES', 'ESTENDIDA', 'XLSCD4A22C', 'EX', 'EX2',
+    'LX', 'LT', 'LTZ', 'SL', 'SR', 'SE', 'ST', 'S', 'LIFE', 'JOY', 'OFFG4', '1016', '160', '2022',
+]
+
+
+def apply_sequential(compiled: List, text: str) -> str:
+    """Implementação original: todas as regras, em ordem"""
+    for pattern, replacement in compiled:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def build_corpus(fixtures_path: str, corpus_path: str = None, generated: int = 20000, seed: int = 42) -> List[str]:
+    """Modelos das fixtures, do arquivo informado e combinações aleatórias de TOKENS"""
+    corpus = []
+
+    if fixtures_path and os.path.exists(fixtures_path):
+        with open(fixtures_path, encoding='utf-8') as f:
+            fixtures = json.load(f)
+
+        for vehicle in fixtures.get('veiculos', []):
+            words = (vehicle.get('normalized_title') or '').split()
+            corpus.append(' '.join(words[1:-1]))
+            corpus.append(vehicle.get('title') or '')
+
+        for models in fixtures.get('ConsultarModelos', {}).values():
+            for model in (models or {}).get('Modelos', []):
+                corpus.append(model.get('Label', ''))
+
+    if corpus_path:
+        with open(corpus_path, encoding='utf-8') as f:
+            corpus.extend(line.strip() for line in f if line.strip())
+
+    rng = random.Random(seed)
+    for _ in range(generated):
+        text = ' '.join(rng.choice(TOKENS) for _ in range(rng.randint(1, 6)))
+        corpus.append(text.lower() if rng.random() < 0.2 else text)
+
+    return corpus
+
+
+def check(corpus: List[str]) -> int:
+    """
+    Compara as duas implementações nas duas cadeias de regras
+
+    Returns:
+        Quantidade de divergências
+    """
+    mismatches = 0
+
+    for name, rules in (
+        ('MODEL_NORMALIZATIONS', FIPESmartSearcher.MODEL_NORMALIZATIONS),
+        ('VERSION_SIMPLIFICATIONS', FIPESmartSearcher.VERSION_SIMPLIFICATIONS),
+    ):
+        chain = RegexRuleChain(rules)
+        changed = 0
+
+        for text in corpus:
+            # Normalização roda sobre o texto em maiúsculas; simplificação, sobre o modelo normalizado
+            for variant in {text, text.upper().strip()}:
+                expected = apply_sequential(chain.compiled, variant)
+                actual = chain.apply(variant)
+
+                if expected != variant:
+                    changed += 1
+
+                if expected != actual:
+                    mismatches += 1
+                    if mismatches <= 20:
+                        print(f"   ❌ {name}: {variant!r} -> esperado {expected!r}, obtido {actual!r}")
+
+        print(f"   • {name}: {len(corpus)} textos, {changed} alterados pelas regras")
+
+    # Ponta a ponta: normalização + simplificação do FIPESmartSearcher
+    searcher = FIPESmartSearcher()
+    for text in corpus:
+        normalized = apply_sequential(searcher.compiled_normalizations, text.upper().strip())
+        normalized = searcher._capitalize_model(normalized).strip()
+        simplified = apply_sequential(searcher.compiled_simplifications, normalized).strip()
+
+        actual = (searcher._apply_normalizations(text), searcher._apply_simplifications(normalized))
+
+        if actual != (normalized, simplified):
+            mismatches += 1
+            if mismatches <= 20:
+                print(f"   ❌ FIPESmartSearcher: {text!r} -> esperado {(normalized, simplified)!r}, obtido {actual!r}")
+
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Equivalência do despacho de regras do FIPESmartSearcher")
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES)
+    parser.add_argument('--corpus', help="Arquivo com um modelo/título por linha")
+    parser.add_argument('--generated', type=int, default=20000, help="Combinações aleatórias de tokens")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print("="*60)
+    print("🔎 EQUIVALÊNCIA DAS REGRAS DE NORMALIZAÇÃO")
+    print("="*60)
+
+    corpus = build_corpus(args.fixtures, args.corpus, args.generated, args.seed)
+    mismatches = check(corpus)
+
+    if mismatches:
+        print(f"❌ {mismatches} divergências")
+        sys.exit(1)
+
+    print("✅ Despacho equivalente à cadeia sequencial")
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FIPE CACHE
+Cache persistente (SQLite) do catálogo FIPE por tabela de referência
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Optional
+
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '.cache',
+    'fipe_cache.sqlite3'
+)
+
+# Validade padrão das buscas sem resultado (s)
+DEFAULT_NEGATIVE_TTL = 7 * 24 * 3600
+
+
+class FipeCache:
+    """
+    Cache em disco das respostas da API FIPE
+
+    Cada resposta é guardada pela chave
+    (endpoint, codigoTabelaReferencia, codigoTipoVeiculo, marca, modelo, ano).
+    Quando a tabela de referência muda, as entradas antigas são descartadas.
+
+    Buscas completas sem resultado (marca/modelo/ano não encontrados) ficam
+    em uma tabela separada, por (chave normalizada, referência), válidas por
+    `negative_ttl` segundos.
+    """
+
+    def __init__(self, path: Optional[str] = None, negative_ttl: Optional[float] = None):
+        self.path = path or os.getenv('FIPE_CACHE_PATH') or DEFAULT_CACHE_PATH
+        self.negative_ttl = negative_ttl if negative_ttl is not None else float(
+            os.getenv('FIPE_NEGATIVE_TTL', DEFAULT_NEGATIVE_TTL)
+        )
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS catalog (
+                endpoint TEXT NOT NULL,
+                ref INTEGER NOT NULL,
+                tipo INTEGER NOT NULL,
+                marca TEXT NOT NULL DEFAULT '',
+                modelo TEXT NOT NULL DEFAULT '',
+                ano TEXT NOT NULL DEFAULT '',
+                payload TEXT NOT NULL,
+                PRIMARY KEY (endpoint, ref, tipo, marca, modelo, ano)
+            );
+
+            CREATE TABLE IF NOT EXISTS negative (
+                key TEXT NOT NULL,
+                ref INTEGER NOT NULL,
+                reason TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (key, ref)
+            );
+
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self._complete = {}
+
+    def set_reference(self, ref: int) -> bool:
+        """
+        Registra a tabela de referência atual
+
+        Returns:
+            True se a referência mudou e o cache foi invalidado
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value FROM meta WHERE key = 'ref'"
+            ).fetchone()
+
+            if row and int(row[0]) == ref:
+                return False
+
+            self.conn.execute("DELETE FROM catalog WHERE ref != ?", (ref,))
+            self.conn.execute("DELETE FROM negative WHERE ref != ?", (ref,))
+            self.conn.execute("DELETE FROM meta WHERE key LIKE 'complete:%'")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('ref', ?)",
+                (str(ref),)
+            )
+            self.conn.commit()
+            self._complete.clear()
+
+        return row is not None
+
+    def mark_complete(self, ref: int, tipo: int):
+        """Marca o catálogo (ref, tipo) como espelhado por completo"""
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, '1')",
+                (f'complete:{ref}:{tipo}',)
+            )
+            self.conn.commit()
+            self._complete[(ref, tipo)] = True
+
+    def is_complete(self, ref: int, tipo: int) -> bool:
+        """Indica se o catálogo (ref, tipo) já foi espelhado pelo prefetch"""
+        key = (ref, tipo)
+
+        with self._lock:
+            if key not in self._complete:
+                row = self.conn.execute(
+                    "SELECT 1 FROM meta WHERE key = ?",
+                    (f'complete:{ref}:{tipo}',)
+                ).fetchone()
+                self._complete[key] = row is not None
+
+            return self._complete[key]
+
+    def get(
+        self,
+        endpoint: str,
+        ref: int,
+        tipo: int,
+        marca: str = '',
+        modelo: str = '',
+        ano: str = ''
+    ) -> Optional[Any]:
+        """Retorna resposta em cache ou None"""
+        with self._lock:
+            row = self.conn.execute(
+                """
+                SELECT payload FROM catalog
+                WHERE endpoint = ? AND ref = ? AND tipo = ?
+                  AND marca = ? AND modelo = ? AND ano = ?
+                """,
+                (endpoint, ref, tipo, str(marca), str(modelo), str(ano))
+            ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(
+        self,
+        endpoint: str,
+        ref: int,
+        tipo: int,
+        payload: Any,
+        marca: str = '',
+        modelo: str = '',
+        ano: str = ''
+    ):
+        """Grava resposta no cache"""
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO catalog
+                    (endpoint, ref, tipo, marca, modelo, ano, payload)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    endpoint, ref, tipo, str(marca), str(modelo), str(ano),
+                    json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+                )
+            )
+            self.conn.commit()
+
+    def get_negative(self, key: str, ref: int) -> Optional[str]:
+        """Motivo de uma busca sem resultado ainda válida, ou None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT reason FROM negative WHERE key = ? AND ref = ? AND created_at >= ?",
+                (key, ref, time.time() - self.negative_ttl)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            self.negative_hits += 1
+            return row[0]
+
+    def set_negative(self, key: str, ref: int, reason: str):
+        """Grava uma busca sem resultado"""
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO negative (key, ref, reason, created_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                (key, ref, reason, time.time())
+            )
+            self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FIPE CONCURRENCY
+Primitivas de concorrência compartilhadas pelos clientes HTTP
+"""
+
+import time
+import threading
+
+
+class TokenBucket:
+    """
+    Rate limiter global (token bucket) com backoff adaptativo (AIMD)
+
+    - `rate` tokens por segundo, acumulando no máximo `burst`
+    - 429 reduz a taxa pela metade e zera os tokens (todas as threads param);
+      429s de requests que já estavam em voo (até 1/rate s após o corte)
+      não cortam de novo
+    - após `success_threshold` sucessos seguidos a taxa sobe `increase`
+      req/s, até `max_rate`
+    """
+
+    def __init__(
+        self,
+        rate: float = 2.0,
+        burst: int = 2,
+        min_rate: float = 0.2,
+        max_rate: float = 10.0,
+        success_threshold: int = 10,
+        increase: float = 0.5
+    ):
+        if burst < 1:
+            raise ValueError("❌ burst deve ser >= 1 (um request consome um token inteiro)")
+        if rate <= 0:
+            raise ValueError("❌ rate deve ser > 0")
+
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, rate)
+        self.success_threshold = success_threshold
+        self.increase = increase
+
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.successes = 0
+        self.throttled_until = 0.0
+
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self) -> float:
+        """
+        Bloqueia até haver um token disponível
+
+        Returns:
+            Tempo (s) aguardado
+        """
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                self._refill()
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+            waited += wait
+
+    def on_throttle(self):
+        """Recebeu 429: desacelera todo mundo (uma vez por janela)"""
+        with self._lock:
+            self.successes = 0
+            now = time.monotonic()
+
+            # Resposta de um request enviado antes do último corte
+            if now < self.throttled_until:
+                return
+
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            self.throttled_until = now + 1 / self.rate
+
+    def on_success(self):
+        """Request OK: acelera (aditivo) após uma sequência de sucessos"""
+        with self._lock:
+            self.successes += 1
+
+            if self.successes >= self.success_threshold:
+                self._refill()
+                self.rate = min(self.max_rate, self.rate + self.increase)
+                self.successes = 0
+
+
+class SingleFlight:
+    """
+    Deduplicação de chamadas idênticas (single-flight + memoização)
+
+    Chamadas concorrentes com a mesma chave aguardam a execução em andamento e
+    recebem o mesmo resultado. Resultados marcados como memorizáveis (inclusive
+    None) ficam guardados pelo resto da execução. Se a execução levantar uma
+    exceção, ela é relançada em todas as chamadas que aguardavam (e nada é
+    memorizado).
+    """
+
+    class _Call:
+        def __init__(self):
+            self.event = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results = {}
+        self._inflight = {}
+
+        self.calls = 0
+        self.hits = 0
+
+    def do(self, key, func):
+        """
+        Executa `func` uma única vez por chave
+
+        Args:
+            key: Chave (hashable) da chamada
+            func: Função sem argumentos que retorna (resultado, memorizável)
+
+        Returns:
+            Resultado da função
+
+        Raises:
+            A exceção levantada por `func` (também nas chamadas que aguardavam)
+        """
+        with self._lock:
+            self.calls += 1
+
+            if key in self._results:
+                self.hits += 1
+                return self._results[key]
+
+            call = self._inflight.get(key)
+            leader = call is None
+
+            if leader:
+                call = self._inflight[key] = self._Call()
+            else:
+                self.hits += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            result, cacheable = func()
+            call.result = result
+
+            if cacheable:
+                with self._lock:
+                    self._results[key] = result
+
+            return result
+
+        except BaseException as e:
+            call.error = e
+            raise
+
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FIPE HISTORY
+Série histórica local de preços FIPE (um chunk colunar por mês de referência)
+"""
+
+import os
+import json
+import bisect
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+
+DEFAULT_HISTORY_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '.cache',
+    'fipe_history'
+)
+
+
+class PriceHistory:
+    """
+    Preços FIPE acumulados entre tabelas de referência
+
+    Cada referência vira um chunk imutável em disco:
+    - ref_<ref>.keys: chaves "codigo_fipe|ano" ordenadas (uma por linha)
+    - ref_<ref>.f64: preços (array de double) na mesma ordem
+
+    A busca em um chunk é binária sobre as chaves; uma série de N meses
+    é uma busca por chunk. `ano` é o código de ano da FIPE (ex: "2020-1").
+    Gravações ficam em memória até `flush()`.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.getenv('FIPE_HISTORY_DIR') or DEFAULT_HISTORY_DIR
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._chunks: Dict[int, Tuple[List[str], array]] = {}
+        self._pending: Dict[int, Dict[str, float]] = {}
+
+        # ref -> mês de referência ("outubro de 2026")
+        self._labels_path = os.path.join(self.directory, 'references.json')
+        self.labels: Dict[int, str] = {}
+
+        if os.path.exists(self._labels_path):
+            with open(self._labels_path, encoding='utf-8') as f:
+                self.labels = {int(ref): label for ref, label in json.load(f).items()}
+
+    @staticmethod
+    def key(codigo_fipe: str, ano: str) -> str:
+        return f"{str(codigo_fipe).strip()}|{str(ano).strip()}"
+
+    def _paths(self, ref: int) -> Tuple[str, str]:
+        base = os.path.join(self.directory, f"ref_{ref}")
+        return base + '.keys', base + '.f64'
+
+    def _chunk(self, ref: int) -> Optional[Tuple[List[str], array]]:
+        """Chunk de uma referência (carregado uma única vez)"""
+        if ref in self._chunks:
+            return self._chunks[ref]
+
+        keys_path, values_path = self._paths(ref)
+
+        if not os.path.exists(keys_path):
+            return None
+
+        with open(keys_path, encoding='utf-8') as f:
+            keys = f.read().split('\n') if os.path.getsize(keys_path) else []
+
+        values = array('d')
+        with open(values_path, 'rb') as f:
+            values.fromfile(f, len(keys))
+
+        self._chunks[ref] = (keys, values)
+        return self._chunks[ref]
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def record(
+        self,
+        ref: int,
+        codigo_fipe: str,
+        ano: str,
+        valor: float,
+        mes_referencia: Optional[str] = None
+    ):
+        """Registra o preço de (codigo_fipe, ano) na referência `ref`"""
+        with self._lock:
+            self._pending.setdefault(ref, {})[self.key(codigo_fipe, ano)] = float(valor)
+
+            if mes_referencia and ref not in self.labels:
+                self.labels[ref] = mes_referencia.strip()
+
+    def flush(self) -> int:
+        """
+        Grava os preços pendentes (mesclando com os chunks existentes)
+
+        Returns:
+            Quantidade de preços gravados
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            written = 0
+
+            for ref, prices in pending.items():
+                chunk = self._chunk(ref)
+                merged = dict(zip(*chunk)) if chunk else {}
+                merged.update(prices)
+
+                keys = sorted(merged)
+                values = array('d', (merged[k] for k in keys))
+
+                keys_path, values_path = self._paths(ref)
+
+                with open(keys_path + '.tmp', 'w', encoding='utf-8') as f:
+                    f.write('\n'.join(keys))
+                with open(values_path + '.tmp', 'wb') as f:
+                    values.tofile(f)
+
+                os.replace(values_path + '.tmp', values_path)
+                os.replace(keys_path + '.tmp', keys_path)
+
+                self._chunks[ref] = (keys, values)
+                written += len(prices)
+
+            if pending:
+                with open(self._labels_path, 'w', encoding='utf-8') as f:
+                    json.dump({str(ref): label for ref, label in sorted(self.labels.items())}, f, ensure_ascii=False)
+
+        return written
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def references(self) -> List[int]:
+        """Referências com chunk em disco, em ordem crescente"""
+        refs = set()
+
+        for name in os.listdir(self.directory):
+            if name.startswith('ref_') and name.endswith('.keys'):
+                refs.add(int(name[4:-5]))
+
+        return sorted(refs)
+
+    def get(self, codigo_fipe: str, ano: str, ref: int) -> Optional[float]:
+        """Preço de (codigo_fipe, ano) em uma referência"""
+        key = self.key(codigo_fipe, ano)
+
+        with self._lock:
+            pending = self._pending.get(ref)
+            if pending and key in pending:
+                return pending[key]
+
+            chunk = self._chunk(ref)
+
+        if not chunk:
+            return None
+
+        keys, values = chunk
+        pos = bisect.bisect_left(keys, key)
+
+        if pos < len(keys) and keys[pos] == key:
+            return values[pos]
+
+        return None
+
+    def series(
+        self,
+        codigo_fipe: str,
+        ano: str,
+        months: Optional[int] = None,
+        until_ref: Optional[int] = None
+    ) -> List[Tuple[int, Optional[str], float]]:
+        """
+        Série de preços de (codigo_fipe, ano)
+
+        Args:
+            codigo_fipe: Código FIPE (ex: "001004-9")
+            ano: Código de ano da FIPE (ex: "2020-1")
+            months: Últimos N meses até `until_ref` (padrão: todos)
+            until_ref: Referência final (padrão: a mais recente)
+
+        Returns:
+            [(ref, mes_referencia, valor), ...] em ordem cronológica
+        """
+        refs = self.references()
+
+        with self._lock:
+            refs = sorted(set(refs) | set(self._pending))
+
+        if until_ref is not None:
+            refs = [r for r in refs if r <= until_ref]
+
+        # As tabelas FIPE são numeradas em sequência, uma por mês
+        if months and refs:
+            last = until_ref if until_ref is not None else refs[-1]
+            refs = [r for r in refs if r > last - months]
+
+        result = []
+
+        for ref in refs:
+            valor = self.get(codigo_fipe, ano, ref)
+            if valor is not None:
+                result.append((ref, self.labels.get(ref), valor))
+
+        return result
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FIPE INDEX
+Índice em memória para listas de marcas/modelos da FIPE
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+
+class CatalogIndex:
+    """
+    Índice de uma lista FIPE ({'Label': ..., 'Value': ...})
+
+    Construído uma vez por (referência, tipo[, marca]):
+    - dict de label em maiúsculo -> código (busca exata)
+    - índice invertido palavra -> posições (busca por palavras em comum)
+    - conjunto de palavras pré-calculado por item
+    """
+
+    def __init__(self, items: List[Dict]):
+        self.items = items
+        self.labels = [str(item['Label']).upper() for item in items]
+        self.values = [item['Value'] for item in items]
+
+        self.exact: Dict[str, object] = {}
+        self.token_sets = []
+        self.postings: Dict[str, List[int]] = {}
+
+        for pos, label in enumerate(self.labels):
+            # Mantém o primeiro item em caso de labels repetidos
+            self.exact.setdefault(label, self.values[pos])
+
+            tokens = frozenset(label.split())
+            self.token_sets.append(tokens)
+
+            for token in tokens:
+                self.postings.setdefault(token, []).append(pos)
+
+        self._partial_memo: Dict[str, Optional[object]] = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def find_exact(self, name: str) -> Optional[object]:
+        """Código do item com label idêntico (case-insensitive)"""
+        return self.exact.get(name.upper().strip())
+
+    def find_partial(self, name: str) -> Optional[object]:
+        """Código do primeiro item cujo label contém `name`"""
+        query = name.upper().strip()
+
+        if query not in self._partial_memo:
+            match = None
+            for pos, label in enumerate(self.labels):
+                if query in label:
+                    match = self.values[pos]
+                    break
+            self._partial_memo[query] = match
+
+        return self._partial_memo[query]
+
+    def best_token_match(self, name: str) -> Tuple[Optional[object], int]:
+        """
+        Item com mais palavras em comum com `name`
+
+        Só percorre os itens que compartilham ao menos uma palavra com a busca.
+        Em caso de empate vence o primeiro item da lista (mesma regra da busca linear).
+
+        Returns:
+            (código, quantidade de palavras em comum)
+        """
+        counts: Dict[int, int] = {}
+
+        for token in set(name.upper().split()):
+            for pos in self.postings.get(token, ()):
+                counts[pos] = counts.get(pos, 0) + 1
+
+        if not counts:
+            return None, 0
+
+        best_pos = min(counts, key=lambda pos: (-counts[pos], pos))
+        return self.values[best_pos], counts[best_pos]
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP TRANSPORT
+Configuração de sessão HTTP (pool de conexões, retry, timeouts) dos clientes
+"""
+
+import os
+from typing import Dict, FrozenSet, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class TransportConfig:
+    """
+    Transporte HTTP de um cliente
+
+    - pool_size: conexões keep-alive por host; deve cobrir a concorrência
+      (threads que usam a sessão ao mesmo tempo), senão conexões extras são
+      abertas e descartadas a cada request
+    - connect_timeout / read_timeout: timeouts separados (s)
+    - retries: novas tentativas no nível da conexão (falha de conexão e,
+      se `status_forcelist` for informado, respostas com esses status)
+    - allowed_methods: verbos retentados após o envio (padrão do urllib3:
+      só os idempotentes; POST/PATCH não são repetidos)
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        retries: int = 2,
+        backoff_factor: float = 0.5,
+        status_forcelist: Tuple[int, ...] = (),
+        allowed_methods: FrozenSet[str] = Retry.DEFAULT_ALLOWED_METHODS
+    ):
+        self.pool_size = max(1, pool_size)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = status_forcelist
+        self.allowed_methods = allowed_methods
+
+    @classmethod
+    def from_env(cls, prefix: str, pool_size: int = 10, **defaults) -> 'TransportConfig':
+        """
+        Lê <PREFIX>_POOL_SIZE, <PREFIX>_CONNECT_TIMEOUT, <PREFIX>_READ_TIMEOUT
+        e <PREFIX>_RETRIES, com os valores informados como padrão
+        """
+        config = cls(pool_size=pool_size, **defaults)
+
+        config.pool_size = int(os.getenv(f'{prefix}_POOL_SIZE', config.pool_size))
+        config.connect_timeout = float(os.getenv(f'{prefix}_CONNECT_TIMEOUT', config.connect_timeout))
+        config.read_timeout = float(os.getenv(f'{prefix}_READ_TIMEOUT', config.read_timeout))
+        config.retries = int(os.getenv(f'{prefix}_RETRIES', config.retries))
+
+        return config
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """(connect, read) para requests"""
+        return (self.connect_timeout, self.read_timeout)
+
+    def build_session(self, headers: Optional[Dict] = None, adapter_retries: bool = True) -> requests.Session:
+        """
+        Sessão com HTTPAdapter dimensionado e retry configurado
+
+        Args:
+            adapter_retries: False quando o cliente faz o próprio retry
+                (as tentativas não se multiplicam entre as duas camadas)
+        """
+        retries = self.retries if adapter_retries else 0
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries if self.status_forcelist else 0,
+            status_forcelist=self.status_forcelist,
+            allowed_methods=self.allowed_methods,
+            backoff_factor=self.backoff_factor,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=retry
+        )
+
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        if headers:
+            session.headers.update(headers)
+
+        return session
+
+
+def connection_stats(session: requests.Session) -> Dict:
+    """
+    Reuso de conexões dos pools urllib3 da sessão
+
+    Returns:
+        {'requests': int, 'connections': int, 'reused': int, 'reuse_ratio': float}
+    """
+    requests_total = 0
+    connections = 0
+    seen = set()
+
+    for adapter in session.adapters.values():
+        manager = getattr(adapter, 'poolmanager', None)
+
+        if manager is None or id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            requests_total += pool.num_requests
+            connections += pool.num_connections
+
+    reused = max(0, requests_total - connections)
+
+    return {
+        'requests': requests_total,
+        'connections': connections,
+        'reused': reused,
+        'reuse_ratio': round(reused / requests_total, 4) if requests_total else 0.0,
+    }
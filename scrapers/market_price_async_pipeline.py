@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MARKET PRICE ASYNC PIPELINE
+Versão em pipeline (asyncio) do MarketPriceScraper
+
+    leitura -> análise -> busca FIPE (N em paralelo) -> gravação em lotes
+
+Os estágios são ligados por filas limitadas: um estágio lento segura os
+anteriores (backpressure) em vez de acumular veículos em memória, e a
+latência do Supabase e da FIPE se sobrepõe em vez de somar.
+"""
+
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from market_price_supabase_client import VehicleFetchError
+from market_price_vehicles_scraper import MarketPriceScraper
+
+
+# Fim da fila
+_DONE = object()
+
+
+class _PageTracker:
+    """
+    Controla quais páginas já foram gravadas por completo
+
+    O cursor do journal só avança até a última página contígua concluída,
+    então uma execução interrompida nunca pula veículos não gravados.
+    """
+
+    def __init__(self):
+        self.pending: Dict[int, int] = {}
+        self.cursors: Dict[int, tuple] = {}
+        self.next_page = 1
+
+    def add_page(self, page: int, size: int, cursor: tuple):
+        self.pending[page] = size
+        self.cursors[page] = cursor
+
+    def done(self, page: int) -> Optional[tuple]:
+        """Marca um veículo da página como concluído; retorna o novo cursor, se avançou"""
+        self.pending[page] -= 1
+        cursor = None
+
+        while self.pending.get(self.next_page) == 0:
+            del self.pending[self.next_page]
+            cursor = self.cursors.pop(self.next_page)
+            self.next_page += 1
+
+        return cursor
+
+
+class AsyncMarketPriceScraper(MarketPriceScraper):
+    """
+    MarketPriceScraper com estágios concorrentes
+
+    Args:
+        concurrency: Buscas FIPE simultâneas
+        queue_size: Capacidade de cada fila entre estágios
+        write_batch: Veículos por gravação em bulk
+        write_interval: Tempo máximo (s) que um lote parcial espera para ser gravado
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        queue_size: int = 200,
+        write_batch: int = 100,
+        write_interval: float = 2.0,
+        **kwargs
+    ):
+        # Pools HTTP dimensionados pela concorrência do estágio FIPE
+        kwargs.setdefault('workers', concurrency)
+        super().__init__(**kwargs)
+        self.concurrency = max(1, concurrency)
+        self.queue_size = queue_size
+        self.write_batch = write_batch
+        self.write_interval = write_interval
+
+        self._pages = _PageTracker()
+
+    # ------------------------------------------------------------------
+    # Estágios
+    # ------------------------------------------------------------------
+
+    async def _fetch_stage(self, out_queue: asyncio.Queue, ref: int, max_batches: int, batch_size: int) -> str:
+        """
+        Lê páginas de veículos sem preço
+
+        Returns:
+            'done' (fim dos registros), 'stop' (limite de páginas) ou
+            'error' (falha de leitura; o cursor fica para a próxima execução)
+        """
+        cursor = self.journal.resume_cursor(ref)
+        if cursor:
+            print(f"   ↩️  Retomando após {cursor[0]} ({cursor[1]})")
+
+        pages = self.db_client.iter_vehicles_without_price(
+            page_size=batch_size,
+            cursor=cursor,
+            columns=self.VEHICLE_COLUMNS
+        )
+        batch_num = 0
+        budget = 0
+        status = 'done'
+
+        try:
+            while True:
+                try:
+                    vehicles = await asyncio.to_thread(next, pages, None)
+                except VehicleFetchError:
+                    # O cursor fica na última página gravada por completo
+                    print("   ↩️  Próxima execução retoma do último cursor salvo")
+                    status = 'error'
+                    break
+
+                if vehicles is None:
+                    break
+
+                batch_num += 1
+                print(f"📦 Página {batch_num}: {len(vehicles)} veículos")
+
+                if self._has_work(vehicles):
+                    budget += 1
+
+                self._pages.add_page(batch_num, len(vehicles), self.db_client.keyset_cursor(vehicles[-1]))
+
+                for vehicle in vehicles:
+                    await out_queue.put((batch_num, vehicle))
+
+                if budget >= max_batches:
+                    status = 'stop'
+                    break
+        finally:
+            pages.close()
+            await out_queue.put(_DONE)
+
+        return status
+
+    async def _analyze_stage(
+        self,
+        in_queue: asyncio.Queue,
+        resolve_queue: asyncio.Queue,
+        write_queue: asyncio.Queue
+    ):
+        """Analisa os veículos; os que não precisam da FIPE vão direto para a gravação"""
+        while True:
+            item = await in_queue.get()
+
+            if item is _DONE:
+                for _ in range(self.concurrency):
+                    await resolve_queue.put(_DONE)
+                return
+
+            page, vehicle = item
+            self._count('processed')
+
+            # Não encontrado em execução anterior (mesma referência)
+            if self._known_not_found(vehicle.get('id')):
+                await write_queue.put((page, vehicle, None, None, 'skipped'))
+                continue
+
+            try:
+                with self.metrics.timer('stage_seconds', stage='analyze'):
+                    analysis = self.analyzer.analyze(vehicle)
+            except Exception as e:
+                print(f"   ❌ Erro ao analisar {vehicle.get('id')}: {str(e)[:50]}")
+                await write_queue.put((page, vehicle, None, None, 'exception'))
+                continue
+
+            await resolve_queue.put((page, vehicle, analysis))
+
+    async def _resolve_stage(self, in_queue: asyncio.Queue, out_queue: asyncio.Queue):
+        """Busca o preço FIPE (um worker por unidade de concorrência)"""
+        while True:
+            item = await in_queue.get()
+
+            if item is _DONE:
+                await out_queue.put(_DONE)
+                return
+
+            page, vehicle, analysis = item
+
+            try:
+                with self.metrics.timer('stage_seconds', stage='fipe_search'):
+                    fipe_data, reason = await asyncio.to_thread(self._search_price, vehicle, analysis)
+            except Exception as e:
+                print(f"   ❌ Erro: {str(e)[:50]}")
+                fipe_data, reason = None, 'exception'
+
+            await out_queue.put((page, vehicle, analysis, fipe_data, reason))
+
+    async def _write_stage(self, in_queue: asyncio.Queue, ref: int):
+        """Acumula os preços encontrados e grava em bulk"""
+        producers = self.concurrency
+        batch: List[tuple] = []
+        deadline = None
+
+        while producers:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+
+            try:
+                item = await asyncio.wait_for(in_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                item = None
+
+            if item is _DONE:
+                producers -= 1
+            elif item is not None:
+                page, vehicle, analysis, fipe_data, reason = item
+
+                if fipe_data and fipe_data.get('valor'):
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.write_interval
+                else:
+                    self._finish_vehicle(page, vehicle, reason, ref)
+
+            full = len(batch) >= self.write_batch
+            expired = deadline is not None and time.monotonic() >= deadline
+
+            if batch and (full or expired or not producers):
+                await self._flush(batch, ref)
+                batch = []
+                deadline = None
+
+    async def _flush(self, batch: List[tuple], ref: int):
+        updates = []
+
+        for _, vehicle, analysis, fipe_data, _ in batch:
+            update = self._build_price_data(analysis, fipe_data)
+            update['id'] = vehicle.get('id')
+            updates.append(update)
+
+        with self.metrics.timer('stage_seconds', stage='db_write'):
+            result = await asyncio.to_thread(self.db_client.batch_update_market_prices, 'veiculos', updates)
+
+        for (page, vehicle, analysis, fipe_data, _), update in zip(batch, updates):
+            if result['results'].get(update['id']):
+                self._count('success', update['vehicle_type'])
+                self._record(update['id'], 'priced')
+            else:
+                self._count('errors')
+                self._record(update['id'], 'error', 'db_write')
+
+            self._advance(page, ref)
+
+        print(f"   💾 {result['success']} gravados, {result['errors']} erros")
+
+    def _finish_vehicle(self, page: int, vehicle: Dict, reason: Optional[str], ref: int):
+        """Contabiliza um veículo sem preço a gravar"""
+        vehicle_id = vehicle.get('id')
+
+        if reason == 'skipped':
+            self._count('skipped')
+        elif reason in ('request_failed', 'exception'):
+            self._count('errors')
+            self._record(vehicle_id, 'error', reason)
+        else:
+            self._count('not_found')
+            self._record(vehicle_id, 'not_found', reason)
+
+        self._advance(page, ref)
+
+    def _advance(self, page: int, ref: int):
+        cursor = self._pages.done(page)
+        if cursor:
+            self.journal.save_cursor(cursor, ref)
+
+    # ------------------------------------------------------------------
+
+    async def run_async(self, max_batches: int = 10, batch_size: int = 50):
+        """Executa o pipeline completo"""
+        print("="*60)
+        print("🚗 MARKET PRICE PIPELINE (ASYNC) - VEÍCULOS")
+        print("="*60)
+
+        start_time = time.time()
+
+        # Threads para as chamadas bloqueantes (requests) dos estágios
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency + 4)
+        loop.set_default_executor(executor)
+
+        ref = await asyncio.to_thread(self._begin_run)
+        if not ref:
+            return
+
+        print(f"   ⚙️  {self.concurrency} buscas FIPE simultâneas, lotes de {self.write_batch}\n")
+
+        fetched = asyncio.Queue(maxsize=self.queue_size)
+        analyzed = asyncio.Queue(maxsize=self.queue_size)
+        resolved = asyncio.Queue(maxsize=self.queue_size)
+
+        status, *_ = await asyncio.gather(
+            self._fetch_stage(fetched, ref, max_batches, batch_size),
+            self._analyze_stage(fetched, analyzed, resolved),
+            *(self._resolve_stage(analyzed, resolved) for _ in range(self.concurrency)),
+            self._write_stage(resolved, ref),
+        )
+
+        # Fim dos registros ou parada normal: a próxima execução recomeça do início
+        if status == 'done':
+            self.journal.finish(ref)
+        elif status == 'stop':
+            self.journal.stop(ref)
+
+        if self.stats['processed'] == 0:
+            print("\n✅ Nenhum veículo sem preço encontrado")
+
+        await asyncio.to_thread(self._end_run, start_time)
+
+    def run(self, max_batches: int = 10, batch_size: int = 50):
+        """Ponto de entrada síncrono do pipeline"""
+        asyncio.run(self.run_async(max_batches=max_batches, batch_size=batch_size))
+
+
+if __name__ == "__main__":
+    print("="*60)
+    print(f"📅 Início: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("="*60)
+
+    with AsyncMarketPriceScraper(
+        concurrency=int(os.getenv('FIPE_CONCURRENCY', '4')),
+        write_batch=int(os.getenv('MARKET_PRICE_WRITE_BATCH', '100')),
+        rate=float(os.getenv('FIPE_RATE', '2.0')),
+        burst=int(os.getenv('FIPE_BURST', '2'))
+    ) as scraper:
+        scraper.run(max_batches=10, batch_size=50)
+
+    print(f"\n📅 Término: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
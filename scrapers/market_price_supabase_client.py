@@ -6,15 +6,27 @@ Cliente para buscar e atualizar preços de mercado
 """
 
 import os
-import requests
+import queue
+import threading
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
+
+from http_transport import TransportConfig, connection_stats
+
+
+class VehicleFetchError(RuntimeError):
+    """Falha ao buscar uma página de veículos (diferente de fim dos registros)"""
 
 
 class MarketPriceSupabaseClient:
     """Cliente Supabase para operações de Market Price"""
     
-    def __init__(self):
+    def __init__(self, bulk_chunk_size: int = 200, transport: Optional[TransportConfig] = None):
+        """
+        Args:
+            bulk_chunk_size: Linhas por request nas gravações em bulk
+            transport: Pool/timeout/retry da sessão (padrão: SUPABASE_* do ambiente)
+        """
         self.url = os.getenv('SUPABASE_URL')
         self.key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
         
@@ -31,14 +43,30 @@ class MarketPriceSupabaseClient:
             'Accept-Profile': 'auctions',
         }
         
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # 5xx transitórios do PostgREST são retentados no adapter só nas leituras (GET);
+        # PATCH/RPC não são repetidos (o veículo segue sem market_price e volta na próxima execução)
+        self.transport = transport or TransportConfig.from_env(
+            'SUPABASE',
+            status_forcelist=(502, 503, 504)
+        )
+        self.session = self.transport.build_session(self.headers)
+        
+        self.bulk_chunk_size = bulk_chunk_size
+        self._bulk_rpc_supported = True
+    
+    # Colunas necessárias para a paginação por keyset
+    CURSOR_COLUMNS = ('created_at', 'id')
+    
+    # Função de gravação em bulk (sql/batch_update_market_prices.sql) e a tabela que ela atualiza
+    BULK_UPDATE_RPC = 'batch_update_market_prices'
+    BULK_UPDATE_TABLE = 'veiculos'
     
     def fetch_vehicles_without_price(
         self, 
         table: str = 'veiculos',
         limit: int = 100,
-        offset: int = 0
+        offset: int = 0,
+        columns: str = '*'
     ) -> List[Dict]:
         """
         Busca veículos sem market_price
@@ -47,6 +75,36 @@ class MarketPriceSupabaseClient:
             table: Nome da tabela
             limit: Quantidade de registros
             offset: Offset para paginação
+            columns: Projeção (select do PostgREST, ex: 'id,title')
+        
+        Returns:
+            Lista de veículos
+        """
+        return self.fetch_vehicles(
+            table,
+            filters={'market_price': 'is.null'},
+            columns=columns,
+            limit=limit,
+            offset=offset
+        )
+    
+    def fetch_vehicles(
+        self,
+        table: str = 'veiculos',
+        filters: Optional[Dict] = None,
+        columns: str = '*',
+        limit: int = 100,
+        offset: int = 0
+    ) -> List[Dict]:
+        """
+        Busca veículos ativos com filtros e projeção explícitos
+        
+        Args:
+            table: Nome da tabela
+            filters: Filtros PostgREST (ex: {'vehicle_type': 'is.null'})
+            columns: Projeção (select do PostgREST, ex: 'id,title')
+            limit: Quantidade de registros
+            offset: Offset para paginação
         
         Returns:
             Lista de veículos
@@ -55,15 +113,15 @@ class MarketPriceSupabaseClient:
             url = f"{self.url}/rest/v1/{table}"
             
             params = {
-                'select': '*',
-                'market_price': 'is.null',
+                'select': columns,
                 'is_active': 'eq.true',
+                **(filters or {}),
                 'limit': limit,
                 'offset': offset,
                 'order': 'created_at.desc'
             }
             
-            r = self.session.get(url, params=params, timeout=30)
+            r = self.session.get(url, params=params, timeout=self.transport.timeout)
             
             if r.status_code == 200:
                 return r.json()
@@ -75,6 +133,190 @@ class MarketPriceSupabaseClient:
             print(f"❌ Erro ao buscar veículos: {e}")
             return []
     
+    def iter_vehicles_without_price(
+        self,
+        table: str = 'veiculos',
+        page_size: int = 100,
+        cursor: Optional[Tuple[str, str]] = None,
+        columns: str = '*',
+        prefetch: int = 1
+    ) -> Iterator[List[Dict]]:
+        """
+        Itera páginas de veículos sem market_price (paginação por keyset)
+        
+        Ao contrário de `offset`, nunca pula nem repete linhas quando veículos
+        recebem preço e saem do filtro durante a execução.
+        
+        Args:
+            table: Nome da tabela
+            page_size: Registros por página
+            cursor: (created_at, id) da última linha já processada
+            columns: Projeção (created_at e id são incluídos automaticamente)
+            prefetch: Páginas buscadas em background à frente do consumidor
+        
+        Yields:
+            Listas de veículos
+        """
+        return self.stream_vehicles(
+            table,
+            filters={'market_price': 'is.null'},
+            columns=columns,
+            page_size=page_size,
+            cursor=cursor,
+            prefetch=prefetch
+        )
+    
+    def stream_vehicles(
+        self,
+        table: str = 'veiculos',
+        filters: Optional[Dict] = None,
+        columns: str = '*',
+        page_size: int = 100,
+        cursor: Optional[Tuple[str, str]] = None,
+        prefetch: int = 1
+    ) -> Iterator[List[Dict]]:
+        """
+        Stream de páginas de veículos ativos (keyset + prefetch em background)
+        
+        Uma thread busca as próximas páginas enquanto a atual é processada.
+        No máximo `prefetch` páginas ficam em memória à frente do consumidor.
+        
+        Args:
+            table: Nome da tabela
+            filters: Filtros PostgREST (ex: {'vehicle_type': 'is.null'})
+            columns: Projeção (created_at e id são incluídos automaticamente)
+            page_size: Registros por página
+            cursor: (created_at, id) da última linha já processada
+            prefetch: Páginas buscadas à frente do consumidor
+        
+        Yields:
+            Listas de veículos
+        
+        Raises:
+            VehicleFetchError: Se uma página falhar (o stream não termina
+                silenciosamente; fim dos registros só com página vazia/curta)
+        """
+        params = {
+            'select': self._with_cursor_columns(columns),
+            'is_active': 'eq.true',
+            **(filters or {}),
+        }
+        
+        pages = queue.Queue(maxsize=max(1, prefetch))
+        stop = threading.Event()
+        done = object()
+        
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce():
+            try:
+                for page in self._iter_keyset(table, params, page_size, cursor):
+                    if not put(page):
+                        return
+            except Exception as e:
+                # Repassado ao consumidor, que relança
+                if not isinstance(e, VehicleFetchError):
+                    e = VehicleFetchError(f"Erro ao buscar veículos: {e}")
+                put(e)
+            finally:
+                put(done)
+        
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        
+        try:
+            while True:
+                page = pages.get()
+                
+                if page is done:
+                    return
+                
+                if isinstance(page, VehicleFetchError):
+                    print(f"❌ {page}")
+                    raise page
+                
+                yield page
+        finally:
+            stop.set()
+    
+    def _with_cursor_columns(self, columns: str) -> str:
+        """Garante as colunas do cursor na projeção"""
+        if columns.strip() == '*':
+            return columns
+        
+        selected = [c.strip() for c in columns.split(',') if c.strip()]
+        missing = [c for c in self.CURSOR_COLUMNS if c not in selected]
+        
+        return ','.join(selected + missing)
+    
+    @staticmethod
+    def keyset_cursor(row: Dict) -> Tuple[str, str]:
+        """Cursor (created_at, id) de uma linha"""
+        return (row.get('created_at'), row.get('id'))
+    
+    def _iter_keyset(
+        self,
+        table: str,
+        filters: Dict,
+        page_size: int,
+        cursor: Optional[Tuple[str, str]] = None
+    ) -> Iterator[List[Dict]]:
+        """
+        Paginação por keyset em (created_at desc, id desc)
+        
+        Raises:
+            VehicleFetchError: Erro de conexão ou status diferente de 200
+        """
+        url = f"{self.url}/rest/v1/{table}"
+        
+        while True:
+            params = {
+                **filters,
+                'limit': page_size,
+                'order': 'created_at.desc,id.desc'
+            }
+            
+            if cursor:
+                created_at, last_id = cursor
+                keyset = (
+                    f'(created_at.lt."{created_at}",'
+                    f'and(created_at.eq."{created_at}",id.lt."{last_id}"))'
+                )
+                
+                if 'or' in filters:
+                    # O filtro do chamador também é um `or`: os dois entram num `and`
+                    del params['or']
+                    params['and'] = f"(or{filters['or']},or{keyset})"
+                else:
+                    params['or'] = keyset
+            
+            try:
+                r = self.session.get(url, params=params, timeout=self.transport.timeout)
+            except Exception as e:
+                raise VehicleFetchError(f"Erro ao buscar veículos: {e}") from e
+            
+            if r.status_code != 200:
+                raise VehicleFetchError(f"Erro {r.status_code}: {r.text[:200]}")
+            
+            rows = r.json()
+            
+            if not rows:
+                return
+            
+            yield rows
+            
+            if len(rows) < page_size:
+                return
+            
+            cursor = self.keyset_cursor(rows[-1])
+    
     def update_market_price(
         self,
         table: str,
@@ -98,47 +340,179 @@ class MarketPriceSupabaseClient:
         Returns:
             True se sucesso
         """
+        return self._patch_row(table, {'id': vehicle_id, **self._build_update_data(price_data)})
+    
+    def _patch_row(self, table: str, row: Dict) -> bool:
+        """PATCH das colunas de uma linha ({'id', coluna: valor, ...})"""
         try:
-            url = f"{self.url}/rest/v1/{table}"
-            
-            update_data = {
-                'market_price': price_data.get('market_price'),
-                'market_price_source': price_data.get('market_price_source'),
-                'market_price_updated_at': datetime.now().isoformat(),
-                'market_price_confidence': price_data.get('market_price_confidence', 'medium'),
-                'market_price_metadata': price_data.get('market_price_metadata', {}),
-            }
-            
-            # Adiciona vehicle_type se fornecido
-            if 'vehicle_type' in price_data:
-                update_data['vehicle_type'] = price_data['vehicle_type']
-            
-            params = {'id': f'eq.{vehicle_id}'}
-            
             r = self.session.patch(
-                url,
-                json=update_data,
-                params=params,
-                timeout=30
+                f"{self.url}/rest/v1/{table}",
+                json={column: value for column, value in row.items() if column != 'id'},
+                params={'id': f"eq.{row['id']}"},
+                timeout=self.transport.timeout
             )
             
             if r.status_code in (200, 204):
                 return True
             else:
-                print(f"❌ Erro ao atualizar {vehicle_id}: {r.status_code}")
+                print(f"❌ Erro ao atualizar {row['id']}: {r.status_code}")
                 return False
         
         except Exception as e:
             print(f"❌ Erro: {e}")
             return False
     
+    def bulk_update_vehicle_type(
+        self,
+        table: str,
+        vehicle_type: str,
+        ids: List[str],
+        chunk_size: Optional[int] = None
+    ) -> Dict:
+        """
+        Grava o mesmo vehicle_type em vários veículos
+        
+        Um PATCH por chunk com filtro `id=in.(...)`.
+        
+        Args:
+            table: Nome da tabela
+            vehicle_type: Tipo a gravar
+            ids: IDs dos veículos
+            chunk_size: IDs por request (padrão: bulk_chunk_size)
+        
+        Returns:
+            {'success': int, 'errors': int}
+        """
+        chunk_size = chunk_size or self.bulk_chunk_size
+        stats = {'success': 0, 'errors': 0}
+        
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            
+            try:
+                r = self.session.patch(
+                    f"{self.url}/rest/v1/{table}",
+                    json={'vehicle_type': vehicle_type},
+                    params={'id': f"in.({','.join(str(i) for i in chunk)})"},
+                    headers={'Prefer': 'return=minimal'},
+                    timeout=self.bulk_timeout
+                )
+                
+                if r.status_code in (200, 204):
+                    stats['success'] += len(chunk)
+                    continue
+                
+                print(f"❌ Erro ao atualizar {len(chunk)} veículos ({vehicle_type}): {r.status_code}")
+            
+            except Exception as e:
+                print(f"❌ Erro: {e}")
+            
+            stats['errors'] += len(chunk)
+        
+        return stats
+    
+    def _build_update_data(self, price_data: Dict) -> Dict:
+        """Monta colunas de market_price a partir de price_data"""
+        update_data = {
+            'market_price': price_data.get('market_price'),
+            'market_price_source': price_data.get('market_price_source'),
+            'market_price_updated_at': datetime.now().isoformat(),
+            'market_price_confidence': price_data.get('market_price_confidence', 'medium'),
+            'market_price_metadata': price_data.get('market_price_metadata', {}),
+        }
+        
+        # Adiciona vehicle_type se fornecido
+        if 'vehicle_type' in price_data:
+            update_data['vehicle_type'] = price_data['vehicle_type']
+        
+        return update_data
+    
+    def _rpc_update_chunk(self, rows: List[Dict]) -> Optional[set]:
+        """
+        Grava um chunk de linhas com uma única chamada à RPC de bulk update
+        
+        Returns:
+            IDs efetivamente atualizados, ou None se a chamada falhou
+            (o chunk deve ser regravado por PATCH)
+        """
+        try:
+            r = self.session.post(
+                f"{self.url}/rest/v1/rpc/{self.BULK_UPDATE_RPC}",
+                json={'payload': rows},
+                timeout=self.bulk_timeout
+            )
+        except Exception as e:
+            print(f"⚠️  Erro na gravação em bulk: {e}")
+            return None
+        
+        if r.status_code == 200:
+            try:
+                return {str(item['id']) for item in r.json()}
+            except (ValueError, KeyError, TypeError) as e:
+                # Resposta fora do formato [{"id": ...}]: o chunk é regravado por PATCH
+                print(f"⚠️  Resposta inválida da gravação em bulk: {e}")
+                return None
+        
+        print(f"⚠️  Gravação em bulk recusada ({r.status_code}): {r.text[:200]}")
+        
+        # Função não instalada: o restante da execução usa PATCH direto
+        if r.status_code == 404:
+            self._bulk_rpc_supported = False
+        
+        return None
+    
+    def batch_update_rows(
+        self,
+        table: str,
+        rows: List[Dict],
+        chunk_size: Optional[int] = None
+    ) -> Dict:
+        """
+        Grava colunas por linha em batch
+        
+        Cada chunk é gravado com uma chamada à RPC `batch_update_market_prices`,
+        que devolve os ids atualizados (ids ausentes do retorno contam como
+        erro). Um chunk recusado cai para PATCH individual só naquele chunk.
+        Colunas ausentes em uma linha não são alteradas.
+        
+        Args:
+            table: Nome da tabela
+            rows: Lista de {'id': str, coluna: valor, ...}
+            chunk_size: Linhas por request (padrão: bulk_chunk_size)
+        
+        Returns:
+            {'success': int, 'errors': int, 'results': {id: bool}}
+        """
+        chunk_size = chunk_size or self.bulk_chunk_size
+        stats = {'success': 0, 'errors': 0, 'results': {}}
+        
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            updated = None
+            
+            if self._bulk_rpc_supported and table == self.BULK_UPDATE_TABLE:
+                updated = self._rpc_update_chunk(chunk)
+            
+            for row in chunk:
+                if updated is not None:
+                    ok = str(row['id']) in updated
+                else:
+                    # Fallback: PATCH por linha
+                    ok = self._patch_row(table, row)
+                
+                stats['results'][row['id']] = ok
+                stats['success' if ok else 'errors'] += 1
+        
+        return stats
+    
     def batch_update_market_prices(
         self,
         table: str,
-        updates: List[Dict]
+        updates: List[Dict],
+        chunk_size: Optional[int] = None
     ) -> Dict:
         """
-        Atualiza múltiplos preços em batch
+        Atualiza múltiplos preços em batch (ver batch_update_rows)
         
         Args:
             table: Nome da tabela
@@ -149,21 +523,14 @@ class MarketPriceSupabaseClient:
                 'vehicle_type': str,
                 ...
             }
+            chunk_size: Linhas por request (padrão: bulk_chunk_size)
         
         Returns:
-            {'success': int, 'errors': int}
+            {'success': int, 'errors': int, 'results': {id: bool}}
         """
-        stats = {'success': 0, 'errors': 0}
-        
-        for update in updates:
-            vehicle_id = update.pop('id')
-            
-            if self.update_market_price(table, vehicle_id, update):
-                stats['success'] += 1
-            else:
-                stats['errors'] += 1
+        rows = [{'id': update['id'], **self._build_update_data(update)} for update in updates]
         
-        return stats
+        return self.batch_update_rows(table, rows, chunk_size)
     
     def get_stats(self, table: str = 'veiculos') -> Dict:
         """Retorna estatísticas da tabela"""
@@ -175,7 +542,7 @@ class MarketPriceSupabaseClient:
                 url,
                 params={'select': 'count', 'is_active': 'eq.true'},
                 headers={**self.headers, 'Prefer': 'count=exact'},
-                timeout=30
+                timeout=self.transport.timeout
             )
             
             total = 0
@@ -187,7 +554,7 @@ class MarketPriceSupabaseClient:
                 url,
                 params={'select': 'count', 'is_active': 'eq.true', 'market_price': 'not.is.null'},
                 headers={**self.headers, 'Prefer': 'count=exact'},
-                timeout=30
+                timeout=self.transport.timeout
             )
             
             with_price = 0
@@ -205,9 +572,24 @@ class MarketPriceSupabaseClient:
             print(f"❌ Erro ao buscar stats: {e}")
             return {'total': 0, 'with_market_price': 0, 'without_market_price': 0}
     
-    def __del__(self):
-        if hasattr(self, 'session'):
-            self.session.close()
+    @property
+    def bulk_timeout(self) -> Tuple[float, float]:
+        """Timeout das gravações em bulk (leitura com o dobro do prazo)"""
+        return (self.transport.connect_timeout, self.transport.read_timeout * 2)
+    
+    def connection_stats(self) -> Dict:
+        """Requests x conexões abertas na sessão (reuso do keep-alive)"""
+        return connection_stats(self.session)
+    
+    def close(self):
+        """Fecha a sessão HTTP (conexões do pool)"""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
 
 
 if __name__ == "__main__":
@@ -216,22 +598,21 @@ if __name__ == "__main__":
     print("="*60)
     
     try:
-        client = MarketPriceSupabaseClient()
-        
-        print("\n📊 Estatísticas:")
-        stats = client.get_stats('veiculos')
-        print(f"   • Total: {stats['total']}")
-        print(f"   • Com preço: {stats['with_market_price']}")
-        print(f"   • Sem preço: {stats['without_market_price']}")
-        print(f"   • Progresso: {stats['percentage_complete']}%")
-        
-        print("\n🔍 Buscando 5 veículos sem preço:")
-        vehicles = client.fetch_vehicles_without_price(limit=5)
-        print(f"   ✅ {len(vehicles)} veículos encontrados")
-        
-        for v in vehicles[:3]:
-            print(f"   • {v.get('title', 'Sem título')[:60]}")
-        
+        with MarketPriceSupabaseClient() as client:
+            print("\n📊 Estatísticas:")
+            stats = client.get_stats('veiculos')
+            print(f"   • Total: {stats['total']}")
+            print(f"   • Com preço: {stats['with_market_price']}")
+            print(f"   • Sem preço: {stats['without_market_price']}")
+            print(f"   • Progresso: {stats['percentage_complete']}%")
+            
+            print("\n🔍 Buscando 5 veículos sem preço:")
+            vehicles = client.fetch_vehicles_without_price(limit=5)
+            print(f"   ✅ {len(vehicles)} veículos encontrados")
+            
+            for v in vehicles[:3]:
+                print(f"   • {v.get('title', 'Sem título')[:60]}")
+            
         print("\n" + "="*60)
         print("✅ Testes concluídos!")
         print("="*60)
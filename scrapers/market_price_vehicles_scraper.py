@@ -5,15 +5,24 @@ MARKET PRICE SCRAPER - VEÍCULOS
 Extrai preços FIPE para veículos no banco de dados
 """
 
+import os
 import json
 import time
 import random
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, Optional, List
 
-from market_price_supabase_client import MarketPriceSupabaseClient
-from vehicle_analyzer import VehicleAnalyzer
+from fipe_cache import FipeCache
+from fipe_concurrency import SingleFlight, TokenBucket
+from fipe_history import PriceHistory
+from fipe_index import CatalogIndex
+from http_transport import TransportConfig, connection_stats
+from market_price_supabase_client import MarketPriceSupabaseClient, VehicleFetchError
+from run_journal import RunJournal
+from run_metrics import RunMetrics
+from vehicle_analyzer import ImprovedVehicleAnalyzer
 
 
 class FipeAPI:
@@ -37,51 +46,188 @@ class FipeAPI:
         'onibus': 3  # Mesmo código de caminhões
     }
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update(self.HEADERS)
+    def __init__(
+        self,
+        cache: Optional[FipeCache] = None,
+        rate: float = 2.0,
+        burst: int = 2,
+        max_rate: float = 10.0,
+        metrics: Optional[RunMetrics] = None,
+        history: Optional[PriceHistory] = None,
+        transport: Optional[TransportConfig] = None
+    ):
+        """
+        Args:
+            cache: Cache persistente do catálogo (opcional)
+            rate: Requests/s iniciais (compartilhado entre threads)
+            burst: Máximo de requests em rajada
+            max_rate: Teto para a aceleração adaptativa
+            metrics: Coletor de métricas (um novo é criado se omitido)
+            history: Série histórica onde os preços consultados são registrados (opcional)
+            transport: Pool/timeout/retry da sessão (padrão: FIPE_* do ambiente)
+        """
+        # Retry só em _request (passa pelo rate limiter); o adapter não repete os POSTs
+        self.transport = transport or TransportConfig.from_env('FIPE')
+        self.session = self.transport.build_session(self.HEADERS, adapter_retries=False)
         self.ref_table = None
-        self.delay = 0.5
+        self.cache = cache
+        self.history = history
+        self.limiter = TokenBucket(rate=rate, burst=burst, max_rate=max_rate)
+        self._ref_lock = threading.Lock()
+        
+        # Índices de marcas/modelos por (ref, tipo, marca)
+        self._indexes: Dict[tuple, CatalogIndex] = {}
+        
+        # Buscas completas deduplicadas por (marca, modelo, ano, tipo)
+        self.lookups = SingleFlight()
+        self._local = threading.local()
+        
+        self.metrics = metrics or RunMetrics()
     
-    def _request(self, endpoint: str, data: dict, retries: int = 3) -> Optional[dict]:
-        """Faz request na API com retry"""
-        for attempt in range(retries):
+    def _request(self, endpoint: str, data: dict) -> Optional[dict]:
+        """Faz request na API com retry (transport.retries) e rate limit global"""
+        throttled = False
+        
+        for attempt in range(self.transport.retries + 1):
             try:
+                # 429 já é tratado pelo rate limiter; demais falhas usam backoff exponencial
                 if attempt > 0:
-                    wait = (2 ** attempt) + random.uniform(0, 1)
-                    time.sleep(wait)
+                    self.metrics.incr('fipe_retries_total', endpoint=endpoint)
+                    
+                    if not throttled:
+                        wait = (2 ** attempt) + random.uniform(0, 1)
+                        self.metrics.sleep(wait, reason='backoff')
                 
-                r = self.session.post(
-                    f"{self.BASE_URL}/{endpoint}",
-                    json=data,
-                    timeout=30
-                )
+                throttled = False
+                waited = self.limiter.acquire()
+                if waited:
+                    self.metrics.observe('sleep_seconds', waited, reason='rate_limit')
+                
+                with self.metrics.timer('fipe_request_seconds', endpoint=endpoint):
+                    r = self.session.post(
+                        f"{self.BASE_URL}/{endpoint}",
+                        json=data,
+                        timeout=self.transport.timeout
+                    )
+                
+                self.metrics.incr('fipe_requests_total', endpoint=endpoint, status=r.status_code)
                 
                 if r.status_code == 429:
-                    time.sleep(5)
+                    self.limiter.on_throttle()
+                    throttled = True
                     continue
                 
                 if r.status_code == 200:
-                    time.sleep(self.delay)
+                    self.limiter.on_success()
                     return r.json()
                 
             except Exception:
-                pass
+                self.metrics.incr('fipe_requests_total', endpoint=endpoint, status='exception')
         
+        # Marca falha de rede (não confundir com "não encontrado")
+        self._local.failed = True
         return None
     
+    def _cached_request(
+        self,
+        endpoint: str,
+        data: dict,
+        marca: str = '',
+        modelo: str = '',
+        ano: str = '',
+        prefetched: bool = True
+    ) -> Optional[dict]:
+        """
+        Faz request usando o cache persistente (se configurado)
+        
+        Args:
+            prefetched: A consulta faz parte do catálogo espelhado pelo prefetch
+                (consultas por código FIPE não fazem)
+        """
+        if not self.cache:
+            return self._request(endpoint, data)
+        
+        ref = data['codigoTabelaReferencia']
+        tipo_cod = data['codigoTipoVeiculo']
+        
+        cached = self.cache.get(endpoint, ref, tipo_cod, marca, modelo, ano)
+        if cached is not None:
+            self.metrics.incr('fipe_cache_total', endpoint=endpoint, result='hit')
+            return cached
+        
+        self.metrics.incr('fipe_cache_total', endpoint=endpoint, result='miss')
+        
+        # Catálogo espelhado pelo prefetch: o que não está no cache não existe
+        if prefetched and self.cache.is_complete(ref, tipo_cod):
+            return None
+        
+        result = self._request(endpoint, data)
+        if result:
+            self.cache.set(endpoint, ref, tipo_cod, result, marca, modelo, ano)
+        
+        return result
+    
     def get_reference_table(self) -> Optional[int]:
         """Pega tabela de referência atual"""
         if self.ref_table:
             return self.ref_table
         
-        data = self._request("ConsultarTabelaDeReferencia", {})
-        if data and len(data) > 0:
-            self.ref_table = int(data[0]['Codigo'])
-            return self.ref_table
+        with self._ref_lock:
+            if self.ref_table:
+                return self.ref_table
+            
+            data = self._request("ConsultarTabelaDeReferencia", {})
+            if data and len(data) > 0:
+                ref = int(data[0]['Codigo'])
+                
+                # Nova tabela de referência invalida o cache
+                if self.cache:
+                    self.cache.set_reference(ref)
+                
+                self.ref_table = ref
+                return self.ref_table
         
         return None
     
+    def _brand_index(self, ref: int, tipo_cod: int) -> Optional[CatalogIndex]:
+        """Índice de marcas de (ref, tipo), construído uma única vez"""
+        key = (ref, tipo_cod, None)
+        index = self._indexes.get(key)
+        
+        if index is None:
+            brands = self._cached_request("ConsultarMarcas", {
+                "codigoTabelaReferencia": ref,
+                "codigoTipoVeiculo": tipo_cod
+            })
+            
+            if not brands:
+                return None
+            
+            index = self._indexes[key] = CatalogIndex(brands)
+        
+        return index
+    
+    def _model_index(self, ref: int, tipo_cod: int, brand_code: str) -> Optional[CatalogIndex]:
+        """Índice de modelos de (ref, tipo, marca), construído uma única vez"""
+        key = (ref, tipo_cod, str(brand_code))
+        index = self._indexes.get(key)
+        
+        if index is None:
+            data = self._cached_request("ConsultarModelos", {
+                "codigoTipoVeiculo": tipo_cod,
+                "codigoTabelaReferencia": ref,
+                "codigoMarca": brand_code
+            }, marca=brand_code)
+            
+            models = data.get('Modelos', []) if data else []
+            
+            if not models:
+                return None
+            
+            index = self._indexes[key] = CatalogIndex(models)
+        
+        return index
+    
     def find_brand_code(self, brand_name: str, vehicle_type: str) -> Optional[str]:
         """Encontra código da marca"""
         tipo_cod = self.TIPO_VEICULO.get(vehicle_type, 1)
@@ -90,27 +236,18 @@ class FipeAPI:
         if not ref:
             return None
         
-        brands = self._request("ConsultarMarcas", {
-            "codigoTabelaReferencia": ref,
-            "codigoTipoVeiculo": tipo_cod
-        })
+        index = self._brand_index(ref, tipo_cod)
         
-        if not brands:
+        if not index:
             return None
         
-        brand_upper = brand_name.upper().strip()
-        
         # Busca exata
-        for brand in brands:
-            if brand['Label'].upper() == brand_upper:
-                return brand['Value']
+        brand_code = index.find_exact(brand_name)
+        if brand_code is not None:
+            return brand_code
         
         # Busca parcial
-        for brand in brands:
-            if brand_upper in brand['Label'].upper():
-                return brand['Value']
-        
-        return None
+        return index.find_partial(brand_name)
     
     def find_model_code(
         self, 
@@ -125,43 +262,37 @@ class FipeAPI:
         if not ref:
             return None
         
-        data = self._request("ConsultarModelos", {
-            "codigoTipoVeiculo": tipo_cod,
-            "codigoTabelaReferencia": ref,
-            "codigoMarca": brand_code
-        })
-        
-        models = data.get('Modelos', []) if data else []
+        index = self._model_index(ref, tipo_cod, brand_code)
         
-        if not models:
+        if not index:
             return None
         
         model_upper = model_name.upper().strip() if model_name else ""
         
         # Busca exata
-        for model in models:
-            if model['Label'].upper() == model_upper:
-                return model['Value']
+        model_code = index.find_exact(model_upper)
+        if model_code is not None:
+            return model_code
         
         # Busca parcial (pelo menos 2 palavras em comum)
-        model_words = set(model_upper.split())
-        
-        best_match = None
-        best_score = 0
-        
-        for model in models:
-            label_words = set(model['Label'].upper().split())
-            common_words = model_words & label_words
-            
-            if len(common_words) > best_score:
-                best_score = len(common_words)
-                best_match = model['Value']
+        best_match, best_score = index.best_token_match(model_upper)
         
         if best_score >= 2:
             return best_match
         
         return None
     
+    def list_models(self, brand_code: str, vehicle_type: str) -> List[Dict]:
+        """Lista de modelos ({'Label', 'Value'}) da marca"""
+        tipo_cod = self.TIPO_VEICULO.get(vehicle_type, 1)
+        ref = self.get_reference_table()
+        
+        if not ref:
+            return []
+        
+        index = self._model_index(ref, tipo_cod, brand_code)
+        return index.items if index else []
+    
     def find_year_code(
         self,
         brand_code: str,
@@ -176,12 +307,12 @@ class FipeAPI:
         if not ref:
             return None
         
-        years = self._request("ConsultarAnoModelo", {
+        years = self._cached_request("ConsultarAnoModelo", {
             "codigoTipoVeiculo": tipo_cod,
             "codigoTabelaReferencia": ref,
             "codigoMarca": brand_code,
             "codigoModelo": model_code
-        })
+        }, marca=brand_code, modelo=model_code)
         
         if not years:
             return None
@@ -200,23 +331,25 @@ class FipeAPI:
         brand_code: str,
         model_code: str,
         year_code: str,
-        vehicle_type: str
+        vehicle_type: str,
+        ref_table: Optional[int] = None
     ) -> Optional[Dict]:
-        """Busca preço FIPE"""
+        """
+        Busca preço FIPE
+        
+        Args:
+            ref_table: Tabela de referência (padrão: a atual)
+        """
         tipo_cod = self.TIPO_VEICULO.get(vehicle_type, 1)
-        ref = self.get_reference_table()
+        ref = ref_table or self.get_reference_table()
         
         if not ref:
             return None
         
         # Separa ano e combustível
-        if '-' in year_code:
-            ano, comb = year_code.split('-')
-        else:
-            ano = year_code
-            comb = '1'
+        ano, comb = self._split_year_code(year_code)
         
-        data = self._request("ConsultarValorComTodosParametros", {
+        data = self._cached_request("ConsultarValorComTodosParametros", {
             "codigoTipoVeiculo": tipo_cod,
             "codigoTabelaReferencia": ref,
             "codigoMarca": brand_code,
@@ -224,11 +357,25 @@ class FipeAPI:
             "anoModelo": ano,
             "codigoTipoCombustivel": comb,
             "tipoConsulta": "tradicional"
-        })
+        }, marca=brand_code, modelo=model_code, ano=year_code)
         
+        return self._parse_price(data, ref, year_code)
+    
+    @staticmethod
+    def _split_year_code(year_code: str) -> tuple:
+        """"2020-1" -> ("2020", "1") (ano, combustível)"""
+        if '-' in year_code:
+            ano, comb = year_code.split('-', 1)
+            return ano, comb
+        return year_code, '1'
+    
+    def _parse_price(self, data: Optional[dict], ref: int, year_code: str) -> Optional[Dict]:
+        """Converte a resposta de ConsultarValorComTodosParametros e registra na série histórica"""
         if not data:
             return None
         
+        ano, _ = self._split_year_code(year_code)
+        
         # Converte valor
         valor_text = data.get('Valor', '')
         valor = None
@@ -244,17 +391,165 @@ class FipeAPI:
             except:
                 pass
         
+        if self.history and valor and data.get('CodigoFipe'):
+            self.history.record(ref, data['CodigoFipe'], year_code, valor, data.get('MesReferencia'))
+        
         return {
             'valor': valor,
             'valor_texto': valor_text,
             'marca': data.get('Marca'),
             'modelo': data.get('Modelo'),
             'ano': int(ano) if ano.isdigit() else None,
+            'ano_codigo': year_code,
             'combustivel': data.get('Combustivel'),
             'codigo_fipe': data.get('CodigoFipe'),
-            'mes_referencia': data.get('MesReferencia')
+            'mes_referencia': data.get('MesReferencia'),
+            'tabela_referencia': ref
         }
     
+    def find_year_code_by_code(
+        self,
+        codigo_fipe: str,
+        year: int,
+        vehicle_type: str,
+        ref_table: Optional[int] = None
+    ) -> Optional[str]:
+        """
+        Código do ano (ex: "2020-1") a partir do código FIPE
+        
+        Args:
+            ref_table: Tabela de referência (padrão: a atual); entra na chave do cache
+        """
+        tipo_cod = self.TIPO_VEICULO.get(vehicle_type, 1)
+        ref = ref_table or self.get_reference_table()
+        
+        if not ref:
+            return None
+        
+        years = self._cached_request("ConsultarAnoModeloPeloCodigoFipe", {
+            "codigoTipoVeiculo": tipo_cod,
+            "codigoTabelaReferencia": ref,
+            "modeloCodigoExterno": codigo_fipe
+        }, marca='codigo', modelo=codigo_fipe, prefetched=False)
+        
+        if not years or not isinstance(years, list):
+            return None
+        
+        year_str = str(year)
+        
+        for y in years:
+            if year_str in y['Label']:
+                return y['Value']
+        
+        return None
+    
+    def get_price_by_code(
+        self,
+        codigo_fipe: str,
+        vehicle_type: str,
+        year_code: Optional[str] = None,
+        year: Optional[int] = None,
+        ref_table: Optional[int] = None
+    ) -> Optional[Dict]:
+        """
+        Preço direto pelo código FIPE (tipoConsulta "codigo")
+        
+        Uma consulta quando `year_code` é conhecido; sem ele, o código do
+        ano sai de ConsultarAnoModeloPeloCodigoFipe a partir de `year`.
+        
+        Args:
+            codigo_fipe: Código FIPE (ex: "001004-9")
+            vehicle_type: carros, motos, caminhoes...
+            year_code: Código do ano da FIPE (ex: "2020-1")
+            year: Ano modelo, usado quando `year_code` não é informado
+            ref_table: Tabela de referência (padrão: a atual)
+        """
+        tipo_cod = self.TIPO_VEICULO.get(vehicle_type, 1)
+        ref = ref_table or self.get_reference_table()
+        
+        if not ref or not codigo_fipe:
+            return None
+        
+        if not year_code and year:
+            year_code = self.find_year_code_by_code(codigo_fipe, year, vehicle_type, ref_table=ref)
+        
+        if not year_code:
+            return None
+        
+        ano, comb = self._split_year_code(year_code)
+        
+        data = self._cached_request("ConsultarValorComTodosParametros", {
+            "codigoTipoVeiculo": tipo_cod,
+            "codigoTabelaReferencia": ref,
+            "codigoMarca": "",
+            "codigoModelo": "",
+            "anoModelo": ano,
+            "codigoTipoCombustivel": comb,
+            "tipoConsulta": "codigo",
+            "modeloCodigoExterno": codigo_fipe
+        }, marca='codigo', modelo=codigo_fipe, ano=year_code, prefetched=False)
+        
+        # A FIPE responde 200 com {"erro": ...} para códigos inexistentes
+        if not data or data.get('erro'):
+            return None
+        
+        return self._parse_price(data, ref, year_code)
+    
+    def get_price_by_labels(
+        self,
+        brand_label: str,
+        model_label: str,
+        year_code: Optional[str],
+        vehicle_type: str,
+        year: Optional[int] = None
+    ) -> Optional[Dict]:
+        """
+        Preço de um veículo já identificado (labels gravados em market_price_metadata)
+        
+        Marca e modelo são resolvidos só por label exato nos índices em cache,
+        então o custo é a consulta de preço. Sem `year_code`, usa o primeiro
+        código de ano que contém `year`.
+        """
+        tipo_cod = self.TIPO_VEICULO.get(vehicle_type, 1)
+        ref = self.get_reference_table()
+        
+        if not ref or not brand_label or not model_label:
+            return None
+        
+        brands = self._brand_index(ref, tipo_cod)
+        brand_code = brands.find_exact(brand_label) if brands else None
+        
+        if brand_code is None:
+            return None
+        
+        models = self._model_index(ref, tipo_cod, brand_code)
+        model_code = models.find_exact(model_label) if models else None
+        
+        if model_code is None:
+            return None
+        
+        if not year_code and year:
+            year_code = self.find_year_code(brand_code, model_code, year, vehicle_type)
+        
+        if not year_code:
+            return None
+        
+        return self.get_price(brand_code, model_code, year_code, vehicle_type)
+    
+    @staticmethod
+    def lookup_key(brand: str, model: str, year: int, vehicle_type: str) -> tuple:
+        """
+        Chave normalizada de um veículo (marca, modelo, ano, tipo)
+        
+        Tipo não identificado é buscado como carros (mesmo padrão de TIPO_VEICULO.get)
+        """
+        return (
+            (brand or '').upper().strip(),
+            (model or '').upper().strip(),
+            str(year),
+            vehicle_type or 'carros'
+        )
+    
     def search_vehicle_price(
         self,
         brand: str,
@@ -272,43 +567,296 @@ class FipeAPI:
                 'marca': str,
                 'modelo': str,
                 'ano': int,
-                'mes_referencia': str
+                'ano_codigo': str,
+                'mes_referencia': str,
+                'tabela_referencia': int
             }
         """
+        return self.lookup_vehicle_price(brand, model, year, vehicle_type)[0]
+    
+    def lookup_vehicle_price(
+        self,
+        brand: str,
+        model: str,
+        year: int,
+        vehicle_type: str
+    ) -> tuple:
+        """
+        Igual a search_vehicle_price, mas informa o motivo quando não encontra
+        
+        Returns:
+            (resultado, motivo) - motivo é None quando o preço foi encontrado,
+            senão um de MISS_REASONS
+        """
+        # Veículos idênticos compartilham a mesma busca (e o mesmo resultado)
+        return self.lookups.do(
+            self.lookup_key(brand, model, year, vehicle_type),
+            lambda: self._resolve_vehicle_price(brand, model, year, vehicle_type)
+        )
+    
+    # Motivos de uma busca sem preço (request_failed não é definitivo)
+    MISS_REASONS = (
+        'brand_not_found',
+        'model_not_found',
+        'year_not_found',
+        'price_not_found',
+        'request_failed',
+    )
+    
+    def _resolve_vehicle_price(
+        self,
+        brand: str,
+        model: str,
+        year: int,
+        vehicle_type: str
+    ) -> tuple:
+        """
+        Executa a cadeia marca -> modelo -> ano -> preço
+        
+        Buscas que já falharam nesta referência (cache negativo) retornam
+        antes de qualquer request.
+        
+        Returns:
+            ((resultado, motivo), memorizável) - falhas de rede não são memorizadas
+        """
+        self._local.failed = False
+        result = None
+        reason = None
+        
+        ref = self.get_reference_table()
+        negative_key = '|'.join(self.lookup_key(brand, model, year, vehicle_type))
+        
+        if ref and self.cache:
+            cached_reason = self.cache.get_negative(negative_key, ref)
+            
+            if cached_reason:
+                self.metrics.incr('fipe_negative_cache_total', result='hit')
+                return (None, cached_reason), True
+            
+            self.metrics.incr('fipe_negative_cache_total', result='miss')
+        
         # 1. Busca código da marca
-        brand_code = self.find_brand_code(brand, vehicle_type)
-        if not brand_code:
-            return None
+        with self.metrics.timer('stage_seconds', stage='brand_lookup'):
+            brand_code = self.find_brand_code(brand, vehicle_type)
         
         # 2. Busca código do modelo
-        model_code = self.find_model_code(brand_code, model, vehicle_type)
-        if not model_code:
-            return None
+        model_code = None
+        if brand_code:
+            with self.metrics.timer('stage_seconds', stage='model_lookup'):
+                model_code = self.find_model_code(brand_code, model, vehicle_type)
+        else:
+            reason = 'brand_not_found'
         
         # 3. Busca código do ano
-        year_code = self.find_year_code(brand_code, model_code, year, vehicle_type)
-        if not year_code:
-            return None
+        year_code = None
+        if model_code:
+            with self.metrics.timer('stage_seconds', stage='year_lookup'):
+                year_code = self.find_year_code(brand_code, model_code, year, vehicle_type)
+        elif not reason:
+            reason = 'model_not_found'
         
         # 4. Busca preço
-        return self.get_price(brand_code, model_code, year_code, vehicle_type)
+        if year_code:
+            with self.metrics.timer('stage_seconds', stage='price_fetch'):
+                result = self.get_price(brand_code, model_code, year_code, vehicle_type)
+        elif not reason:
+            reason = 'year_not_found'
+        
+        if result and result.get('valor'):
+            reason = None
+        elif self._local.failed:
+            reason = 'request_failed'
+        elif not reason:
+            reason = 'price_not_found'
+        
+        # Só "não encontrado" vai para o cache negativo (falhas de rede não)
+        if reason and reason != 'request_failed' and ref and self.cache:
+            self.cache.set_negative(negative_key, ref, reason)
+        
+        return (result, reason), not self._local.failed
+    
+    def prefetch_catalog(self, vehicle_type: str, include_prices: bool = True) -> Dict:
+        """
+        Espelha o catálogo completo (marcas -> modelos -> anos -> preços)
+        de um tipo de veículo no cache local
+        
+        Returns:
+            {'brands': int, 'models': int, 'years': int, 'prices': int, 'errors': int}
+        """
+        stats = {'brands': 0, 'models': 0, 'years': 0, 'prices': 0, 'errors': 0}
+        
+        if not self.cache:
+            raise ValueError("❌ Prefetch requer um FipeCache configurado")
+        
+        tipo_cod = self.TIPO_VEICULO.get(vehicle_type, 1)
+        ref = self.get_reference_table()
+        
+        if not ref:
+            stats['errors'] += 1
+            return stats
+        
+        if self.cache.is_complete(ref, tipo_cod):
+            print(f"   ✅ {vehicle_type}: catálogo já espelhado (ref {ref})")
+            return stats
+        
+        brands = self._cached_request("ConsultarMarcas", {
+            "codigoTabelaReferencia": ref,
+            "codigoTipoVeiculo": tipo_cod
+        })
+        
+        if not brands:
+            stats['errors'] += 1
+            return stats
+        
+        for brand in brands:
+            stats['brands'] += 1
+            brand_code = brand['Value']
+            
+            data = self._cached_request("ConsultarModelos", {
+                "codigoTipoVeiculo": tipo_cod,
+                "codigoTabelaReferencia": ref,
+                "codigoMarca": brand_code
+            }, marca=brand_code)
+            
+            if not data:
+                stats['errors'] += 1
+                continue
+            
+            for model in data.get('Modelos', []):
+                stats['models'] += 1
+                model_code = model['Value']
+                
+                years = self._cached_request("ConsultarAnoModelo", {
+                    "codigoTipoVeiculo": tipo_cod,
+                    "codigoTabelaReferencia": ref,
+                    "codigoMarca": brand_code,
+                    "codigoModelo": model_code
+                }, marca=brand_code, modelo=model_code)
+                
+                if not years:
+                    stats['errors'] += 1
+                    continue
+                
+                stats['years'] += len(years)
+                
+                if not include_prices:
+                    continue
+                
+                for y in years:
+                    if self.get_price(brand_code, model_code, y['Value'], vehicle_type):
+                        stats['prices'] += 1
+                    else:
+                        stats['errors'] += 1
+            
+            print(f"   • {brand['Label']}: {stats['models']} modelos / {stats['prices']} preços")
+        
+        # Só considera espelhado se nada falhou
+        if include_prices and stats['errors'] == 0:
+            self.cache.mark_complete(ref, tipo_cod)
+        
+        return stats
+    
+    def connection_stats(self) -> Dict:
+        """Requests x conexões abertas na sessão (reuso do keep-alive)"""
+        return connection_stats(self.session)
+    
+    def close(self):
+        """Fecha a sessão HTTP (conexões do pool)"""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
 
 
 class MarketPriceScraper:
     """Scraper principal de market price"""
     
-    def __init__(self):
-        self.db_client = MarketPriceSupabaseClient()
-        self.analyzer = VehicleAnalyzer()
-        self.fipe = FipeAPI()
+    # Colunas usadas pelo analyzer (evita select=*) + código FIPE já conhecido
+    VEHICLE_COLUMNS = 'id,title,normalized_title,description,metadata,market_price_metadata'
+    
+    def __init__(
+        self,
+        workers: int = 1,
+        rate: float = 2.0,
+        burst: int = 2,
+        grouped: bool = False,
+        journal: Optional[RunJournal] = None,
+        analyzer=None
+    ):
+        """
+        Args:
+            workers: Veículos processados em paralelo
+            rate: Requests/s iniciais na API FIPE
+            burst: Máximo de requests em rajada na API FIPE
+            grouped: Resolve o batch agrupando veículos idênticos
+            journal: Checkpoint da execução (um novo é aberto se omitido)
+            analyzer: Objeto com analyze(vehicle) (padrão: ImprovedVehicleAnalyzer)
+        """
+        self.workers = max(1, workers)
+        
+        # Uma conexão keep-alive por worker (+ leitura em background no Supabase)
+        self.metrics = RunMetrics()
+        self.db_client = MarketPriceSupabaseClient(
+            transport=TransportConfig.from_env(
+                'SUPABASE',
+                pool_size=self.workers + 2,
+                status_forcelist=(502, 503, 504)
+            )
+        )
+        self.analyzer = analyzer or ImprovedVehicleAnalyzer()
+        self.fipe = FipeAPI(
+            cache=FipeCache(),
+            rate=rate,
+            burst=burst,
+            metrics=self.metrics,
+            history=PriceHistory(),
+            transport=TransportConfig.from_env('FIPE', pool_size=self.workers)
+        )
+        self.grouped = grouped
+        self.journal = journal or RunJournal()
         
         self.stats = {
             'processed': 0,
             'success': 0,
             'not_found': 0,
+            'skipped': 0,
             'errors': 0,
             'by_type': {}
         }
+        self._stats_lock = threading.Lock()
+    
+    def _count(self, key: str, vehicle_type: Optional[str] = None):
+        """Incrementa estatística (thread-safe)"""
+        self.metrics.incr('vehicles_total', outcome=key)
+        
+        with self._stats_lock:
+            self.stats[key] += 1
+            
+            if vehicle_type:
+                self.stats['by_type'][vehicle_type] = self.stats['by_type'].get(vehicle_type, 0) + 1
+    
+    def _record(self, vehicle_id, outcome: str, reason: Optional[str] = None):
+        """Registra o resultado do veículo no journal (referência FIPE atual)"""
+        self.journal.record(vehicle_id, outcome, reason, self.fipe.ref_table)
+    
+    def _known_not_found(self, vehicle_id) -> Optional[str]:
+        """Motivo se o veículo já não foi encontrado nesta referência"""
+        return self.journal.known_not_found(vehicle_id, self.fipe.ref_table)
+    
+    def _has_work(self, vehicles: List[Dict]) -> bool:
+        """
+        Se a página tem algum veículo a buscar
+        
+        Páginas só com `not_found` desta referência não contam no limite de
+        páginas: toda execução recomeça do início e passa por elas sem requests.
+        """
+        return any(
+            not self.journal.not_found_reason(vehicle.get('id'), self.fipe.ref_table)
+            for vehicle in vehicles
+        )
     
     def process_batch(self, batch_size: int = 50, offset: int = 0) -> bool:
         """
@@ -324,95 +872,338 @@ class MarketPriceScraper:
         # Busca veículos sem preço
         vehicles = self.db_client.fetch_vehicles_without_price(
             limit=batch_size,
-            offset=offset
+            offset=offset,
+            columns=self.VEHICLE_COLUMNS
         )
         
         if not vehicles:
             print("✅ Nenhum veículo sem preço encontrado")
             return False
         
+        self.process_vehicles(vehicles)
+        return True
+    
+    def process_vehicles(self, vehicles: List[Dict]):
+        """Processa uma lista de veículos já carregada"""
         print(f"📋 {len(vehicles)} veículos carregados\n")
         
-        for idx, vehicle in enumerate(vehicles, 1):
-            self.stats['processed'] += 1
-            vehicle_id = vehicle.get('id')
-            title = vehicle.get('title', '')[:60]
-            
-            print(f"[{idx}/{len(vehicles)}] {title}...")
+        if self.grouped:
+            self._process_grouped(vehicles)
+            return
+        
+        total = len(vehicles)
+        
+        if self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(
+                    lambda item: self._process_vehicle(item[0], total, item[1]),
+                    enumerate(vehicles, 1)
+                ))
+        else:
+            for idx, vehicle in enumerate(vehicles, 1):
+                self._process_vehicle(idx, total, vehicle)
+    
+    def _process_vehicle(self, idx: int, total: int, vehicle: Dict):
+        """Analisa, busca na FIPE e atualiza um veículo"""
+        self._count('processed')
+        vehicle_id = vehicle.get('id')
+        title = (vehicle.get('title') or '')[:60]
+        
+        # Log acumulado e impresso de uma vez (evita linhas intercaladas entre threads)
+        log = [f"[{idx}/{total}] {title}..."]
+        
+        try:
+            # Não encontrado em execução anterior (mesma referência)
+            known = self._known_not_found(vehicle_id)
+            if known:
+                log.append(f"   ⏭️  Não encontrado anteriormente ({known})")
+                self._count('skipped')
+                return
             
-            try:
-                # Analisa veículo
+            # Analisa veículo
+            with self.metrics.timer('stage_seconds', stage='analyze'):
                 analysis = self.analyzer.analyze(vehicle)
+            
+            vehicle_type = analysis.get('vehicle_type')
+            brand = analysis.get('brand')
+            model = analysis.get('model')
+            year = analysis.get('year_model')
+            
+            log.append(f"   🔍 {vehicle_type} | {brand} {model} {year}")
+            
+            # Busca na FIPE
+            with self.metrics.timer('stage_seconds', stage='fipe_search'):
+                fipe_data, reason = self._search_price(vehicle, analysis)
+            
+            if reason == 'insufficient_data':
+                log.append(f"   ⚠️  Dados insuficientes")
+                self._count('not_found')
+                self._record(vehicle_id, 'not_found', reason)
+                return
+            
+            if fipe_data and fipe_data.get('valor'):
+                # Atualiza DB
+                price_data = self._build_price_data(analysis, fipe_data)
                 
-                vehicle_type = analysis.get('vehicle_type')
-                brand = analysis.get('brand')
-                model = analysis.get('model')
-                year = analysis.get('year_model')
-                
-                print(f"   🔍 {vehicle_type} | {brand} {model} {year}")
-                
-                # Só busca FIPE se tiver dados mínimos
-                if not brand or not year:
-                    print(f"   ⚠️  Dados insuficientes")
-                    self.stats['not_found'] += 1
-                    continue
-                
-                # Busca na FIPE
-                fipe_data = self.fipe.search_vehicle_price(
-                    brand=brand,
-                    model=model or "",
-                    year=year,
-                    vehicle_type=vehicle_type
-                )
+                with self.metrics.timer('stage_seconds', stage='db_write'):
+                    updated = self.db_client.update_market_price('veiculos', vehicle_id, price_data)
                 
-                if fipe_data and fipe_data.get('valor'):
-                    # Atualiza DB
-                    price_data = {
-                        'market_price': fipe_data['valor'],
-                        'market_price_source': 'fipe',
-                        'market_price_confidence': analysis.get('confidence', 'medium'),
-                        'vehicle_type': vehicle_type,
-                        'market_price_metadata': {
-                            'codigo_fipe': fipe_data.get('codigo_fipe'),
-                            'mes_referencia': fipe_data.get('mes_referencia'),
-                            'combustivel': fipe_data.get('combustivel'),
-                            'marca_fipe': fipe_data.get('marca'),
-                            'modelo_fipe': fipe_data.get('modelo'),
-                            'ano_fipe': fipe_data.get('ano')
-                        }
-                    }
+                if updated:
+                    log.append(f"   ✅ {self._format_brl(fipe_data['valor'])}")
                     
-                    if self.db_client.update_market_price('veiculos', vehicle_id, price_data):
-                        valor_fmt = f"R$ {fipe_data['valor']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                        print(f"   ✅ {valor_fmt}")
-                        self.stats['success'] += 1
-                        
-                        # Contabiliza por tipo
-                        self.stats['by_type'][vehicle_type] = self.stats['by_type'].get(vehicle_type, 0) + 1
-                    else:
-                        print(f"   ❌ Erro ao atualizar DB")
-                        self.stats['errors'] += 1
+                    # Contabiliza por tipo
+                    self._count('success', vehicle_type)
+                    self._record(vehicle_id, 'priced')
                 else:
-                    print(f"   ⚠️  Não encontrado na FIPE")
-                    self.stats['not_found'] += 1
-                
+                    log.append(f"   ❌ Erro ao atualizar DB")
+                    self._count('errors')
+                    self._record(vehicle_id, 'error', 'db_write')
+            elif reason == 'request_failed':
+                log.append(f"   ❌ Falha na API FIPE")
+                self._count('errors')
+                self._record(vehicle_id, 'error', reason)
+            else:
+                log.append(f"   ⚠️  Não encontrado na FIPE ({reason})")
+                self._count('not_found')
+                self._record(vehicle_id, 'not_found', reason)
+            
+        except Exception as e:
+            log.append(f"   ❌ Erro: {str(e)[:50]}")
+            self._count('errors')
+            self._record(vehicle_id, 'error', 'exception')
+        
+        finally:
+            print('\n'.join(log))
+    
+    @staticmethod
+    def _known_code(vehicle: Dict) -> tuple:
+        """(codigo_fipe, código do ano) gravados em market_price_metadata"""
+        known = vehicle.get('market_price_metadata') or {}
+        return known.get('codigo_fipe'), known.get('ano_codigo_fipe')
+    
+    def _search_price(self, vehicle: Dict, analysis: Dict) -> tuple:
+        """
+        Busca o preço FIPE de um veículo analisado
+        
+        Com código FIPE conhecido usa a consulta direta por código (1-2
+        requests); senão, ou se ela falhar, a cadeia marca -> modelo -> ano.
+        
+        Returns:
+            (resultado, motivo) - motivo 'insufficient_data' quando não há
+            código nem marca/ano
+        """
+        vehicle_type = analysis.get('vehicle_type')
+        brand = analysis.get('brand')
+        year = analysis.get('year_model')
+        codigo_fipe, year_code = self._known_code(vehicle)
+        
+        if codigo_fipe:
+            fipe_data = self.fipe.get_price_by_code(
+                codigo_fipe,
+                vehicle_type,
+                year_code=year_code,
+                year=year or (vehicle.get('market_price_metadata') or {}).get('ano_fipe')
+            )
+            
+            if fipe_data and fipe_data.get('valor'):
+                self.metrics.incr('fipe_code_lookups_total', result='hit')
+                return fipe_data, None
+            
+            self.metrics.incr('fipe_code_lookups_total', result='miss')
+        
+        # Só busca pela cadeia se tiver dados mínimos
+        if not brand or not year:
+            return None, 'insufficient_data'
+        
+        return self.fipe.lookup_vehicle_price(
+            brand=brand,
+            model=analysis.get('model') or "",
+            year=year,
+            vehicle_type=vehicle_type
+        )
+    
+    @staticmethod
+    def _build_price_data(analysis: Dict, fipe_data: Dict) -> Dict:
+        """Monta payload de market_price a partir da análise e do resultado FIPE"""
+        return {
+            'market_price': fipe_data['valor'],
+            'market_price_source': 'fipe',
+            'market_price_confidence': analysis.get('confidence', 'medium'),
+            'vehicle_type': analysis.get('vehicle_type'),
+            'market_price_metadata': {
+                'codigo_fipe': fipe_data.get('codigo_fipe'),
+                'mes_referencia': fipe_data.get('mes_referencia'),
+                'combustivel': fipe_data.get('combustivel'),
+                'marca_fipe': fipe_data.get('marca'),
+                'modelo_fipe': fipe_data.get('modelo'),
+                'ano_fipe': fipe_data.get('ano'),
+                'ano_codigo_fipe': fipe_data.get('ano_codigo'),
+                'tabela_referencia': fipe_data.get('tabela_referencia')
+            }
+        }
+    
+    @staticmethod
+    def _format_brl(valor: float) -> str:
+        return f"R$ {valor:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+    
+    def _process_grouped(self, vehicles: List[Dict]):
+        """
+        Resolve o batch inteiro agrupando veículos idênticos
+        
+        1. Analisa todos os veículos
+        2. Agrupa por (marca, modelo, ano, tipo) normalizados
+        3. Busca cada grupo uma única vez na FIPE
+        4. Grava os preços de todos os anúncios em bulk
+        """
+        groups: Dict[tuple, List[tuple]] = {}
+        
+        # 1-2. Análise e agrupamento
+        for vehicle in vehicles:
+            self._count('processed')
+            
+            if self._known_not_found(vehicle.get('id')):
+                self._count('skipped')
+                continue
+            
+            try:
+                with self.metrics.timer('stage_seconds', stage='analyze'):
+                    analysis = self.analyzer.analyze(vehicle)
+            except Exception as e:
+                print(f"   ❌ Erro ao analisar {vehicle.get('id')}: {str(e)[:50]}")
+                self._count('errors')
+                self._record(vehicle.get('id'), 'error', 'exception')
+                continue
+            
+            brand = analysis.get('brand')
+            year = analysis.get('year_model')
+            codigo_fipe, year_code = self._known_code(vehicle)
+            
+            if codigo_fipe:
+                # Código FIPE conhecido: agrupa pelo código
+                key = ('CODIGO', codigo_fipe, year_code or str(year), analysis.get('vehicle_type'))
+            elif brand and year:
+                key = self.fipe.lookup_key(
+                    brand,
+                    analysis.get('model') or "",
+                    year,
+                    analysis.get('vehicle_type')
+                )
+            else:
+                # Só busca FIPE se tiver dados mínimos
+                self._count('not_found')
+                self._record(vehicle.get('id'), 'not_found', 'insufficient_data')
+                continue
+            
+            groups.setdefault(key, []).append((vehicle, analysis))
+        
+        print(f"🧩 {len(groups)} veículos distintos em {len(vehicles)} anúncios\n")
+        
+        # 3. Uma busca por grupo
+        def resolve(item):
+            key, members = item
+            vehicle, analysis = members[0]
+            
+            try:
+                with self.metrics.timer('stage_seconds', stage='fipe_search'):
+                    fipe_data, reason = self._search_price(vehicle, analysis)
             except Exception as e:
                 print(f"   ❌ Erro: {str(e)[:50]}")
-                self.stats['errors'] += 1
+                fipe_data, reason = None, 'exception'
+            
+            brand, model, year, vehicle_type = key
+            label = f"{vehicle_type} | {brand} {model} {year} (x{len(members)})"
             
-            # Delay entre veículos
-            time.sleep(random.uniform(0.5, 1.0))
+            if fipe_data and fipe_data.get('valor'):
+                print(f"   ✅ {label}: {self._format_brl(fipe_data['valor'])}")
+            else:
+                print(f"   ⚠️  {label}: não encontrado na FIPE ({reason})")
+            
+            return key, (fipe_data, reason)
         
-        return True
+        if self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = dict(executor.map(resolve, groups.items()))
+        else:
+            results = dict(map(resolve, groups.items()))
+        
+        # 4. Distribui o resultado para cada anúncio e grava em bulk
+        updates: List[Dict] = []
+        
+        for key, members in groups.items():
+            fipe_data, reason = results[key]
+            
+            if not fipe_data or not fipe_data.get('valor'):
+                # Falhas de rede/exceções são retentadas na próxima execução
+                failed = reason in ('request_failed', 'exception')
+                
+                for vehicle, _ in members:
+                    self._count('errors' if failed else 'not_found')
+                    self._record(vehicle.get('id'), 'error' if failed else 'not_found', reason)
+                continue
+            
+            for vehicle, analysis in members:
+                update = self._build_price_data(analysis, fipe_data)
+                update['id'] = vehicle.get('id')
+                updates.append(update)
+        
+        if not updates:
+            return
+        
+        with self.metrics.timer('stage_seconds', stage='db_write'):
+            result = self.db_client.batch_update_market_prices('veiculos', updates)
+        
+        for update in updates:
+            if result['results'].get(update['id']):
+                self._count('success', update['vehicle_type'])
+                self._record(update['id'], 'priced')
+            else:
+                self._count('errors')
+                self._record(update['id'], 'error', 'db_write')
+        
+        print(f"\n   💾 {result['success']} gravados, {result['errors']} erros")
     
-    def run(self, max_batches: int = 10, batch_size: int = 50):
-        """Executa scraping completo"""
-        print("="*60)
-        print("🚗 MARKET PRICE SCRAPER - VEÍCULOS")
-        print("="*60)
+    def export_metrics(self, directory: Optional[str] = None) -> tuple:
+        """Grava o relatório de métricas da execução (.json e .prom)"""
+        directory = directory or os.getenv('MARKET_PRICE_METRICS_DIR') or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'metrics'
+        )
         
-        start_time = time.time()
+        if self.fipe.cache:
+            total = self.fipe.cache.hits + self.fipe.cache.misses
+            self.metrics.set_gauge('fipe_cache_hit_ratio', round(self.fipe.cache.hits / total, 4) if total else 0)
         
+        lookups = self.fipe.lookups
+        self.metrics.set_gauge('fipe_lookup_shared_ratio', round(lookups.hits / lookups.calls, 4) if lookups.calls else 0)
+        
+        for service, stats in (('fipe', self.fipe.connection_stats()), ('supabase', self.db_client.connection_stats())):
+            self.metrics.set_gauge('http_connections_opened', stats['connections'], service=service)
+            self.metrics.set_gauge('http_connection_reuse_ratio', stats['reuse_ratio'], service=service)
+        self.metrics.set_gauge('fipe_rate_limit', round(self.fipe.limiter.rate, 3))
+        
+        return self.metrics.export(directory, 'market_price_metrics')
+    
+    def close(self):
+        """Fecha sessões HTTP, cache e journal"""
+        self.fipe.close()
+        self.db_client.close()
+        self.journal.close()
+        
+        if self.fipe.cache:
+            self.fipe.cache.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def _begin_run(self) -> Optional[int]:
+        """
+        Mostra as estatísticas iniciais e inicializa a API FIPE
+        
+        Returns:
+            Tabela de referência atual ou None se a FIPE não respondeu
+        """
         # Mostra estatísticas iniciais
         stats = self.db_client.get_stats('veiculos')
         print(f"\n📊 ESTATÍSTICAS INICIAIS:")
@@ -428,25 +1219,69 @@ class MarketPriceScraper:
             print(f"   ✅ Referência: {ref}")
         else:
             print(f"   ❌ Erro ao conectar com FIPE")
+        
+        return ref
+    
+    def run(self, max_batches: int = 10, batch_size: int = 50):
+        """Executa scraping completo"""
+        print("="*60)
+        print("🚗 MARKET PRICE SCRAPER - VEÍCULOS")
+        print("="*60)
+        
+        start_time = time.time()
+        
+        ref = self._begin_run()
+        if not ref:
             return
         
-        # Processa batches
-        offset = 0
+        # Retoma do cursor só se a execução anterior foi interrompida
+        cursor = self.journal.resume_cursor(ref)
+        if cursor:
+            print(f"   ↩️  Retomando após {cursor[0]} ({cursor[1]})")
+        
+        # Processa batches (keyset + próxima página buscada em background)
+        pages = self.db_client.iter_vehicles_without_price(
+            page_size=batch_size,
+            cursor=cursor,
+            columns=self.VEHICLE_COLUMNS
+        )
         batch_num = 0
+        budget = 0
         
-        while batch_num < max_batches:
-            has_more = self.process_batch(batch_size, offset)
-            
-            if not has_more:
-                break
-            
-            offset += batch_size
-            batch_num += 1
-            
-            # Delay entre batches
-            if batch_num < max_batches:
-                print(f"\n⏳ Aguardando 5s antes do próximo batch...")
-                time.sleep(5)
+        try:
+            for vehicles in pages:
+                batch_num += 1
+                
+                if self._has_work(vehicles):
+                    budget += 1
+                
+                print(f"\n{'='*60}")
+                print(f"📦 PROCESSANDO BATCH {batch_num}")
+                print(f"{'='*60}")
+                
+                self.process_vehicles(vehicles)
+                self.journal.save_cursor(self.db_client.keyset_cursor(vehicles[-1]), ref)
+                
+                if budget >= max_batches:
+                    # Parada normal: a próxima execução começa pelos anúncios novos
+                    self.journal.stop(ref)
+                    break
+            else:
+                # Fim dos registros: a próxima execução recomeça do início
+                self.journal.finish(ref)
+        except VehicleFetchError:
+            # Falha na leitura: o cursor fica na última página concluída
+            print("   ↩️  Próxima execução retoma do último cursor salvo")
+        
+        if batch_num == 0:
+            print("\n✅ Nenhum veículo sem preço encontrado")
+        
+        self._end_run(start_time)
+    
+    def _end_run(self, start_time: float):
+        """Grava a série histórica, mostra o resumo e exporta as métricas"""
+        # Preços do mês entram na série histórica
+        self.fipe.history.flush()
         
         # Estatísticas finais
         elapsed = time.time() - start_time
@@ -457,6 +1292,7 @@ class MarketPriceScraper:
         print(f"   • Processados: {self.stats['processed']}")
         print(f"   • Sucesso: {self.stats['success']}")
         print(f"   • Não encontrados: {self.stats['not_found']}")
+        print(f"   • Pulados (journal): {self.stats['skipped']}")
         print(f"   • Erros: {self.stats['errors']}")
         
         if self.stats['by_type']:
@@ -464,8 +1300,23 @@ class MarketPriceScraper:
             for vtype, count in self.stats['by_type'].items():
                 print(f"      • {vtype}: {count}")
         
+        if self.fipe.cache:
+            print(f"\n   💾 Cache FIPE: {self.fipe.cache.hits} hits / {self.fipe.cache.misses} misses")
+            print(f"   🚫 Cache negativo: {self.fipe.cache.negative_hits} buscas evitadas")
+        
+        lookups = self.fipe.lookups
+        print(f"   🔁 Buscas FIPE reaproveitadas: {lookups.hits}/{lookups.calls}")
+        
+        for label, client in (('FIPE', self.fipe), ('Supabase', self.db_client)):
+            conn = client.connection_stats()
+            print(f"   🔌 Conexões {label}: {conn['connections']} abertas para {conn['requests']} requests")
+        
         print(f"\n   ⏱️  Tempo: {elapsed/60:.1f}min")
         
+        # Relatório de métricas (JSON + Prometheus textfile)
+        json_path, prom_path = self.export_metrics()
+        print(f"   📈 Métricas: {json_path}")
+        
         # Estatísticas finais do DB
         final_stats = self.db_client.get_stats('veiculos')
         print(f"\n   📊 PROGRESSO FINAL:")
@@ -481,9 +1332,13 @@ if __name__ == "__main__":
     print(f"📅 Início: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("="*60)
     
-    scraper = MarketPriceScraper()
-    
-    # Processa até 10 batches de 50 veículos (500 total)
-    scraper.run(max_batches=10, batch_size=50)
+    with MarketPriceScraper(
+        workers=int(os.getenv('FIPE_WORKERS', '1')),
+        rate=float(os.getenv('FIPE_RATE', '2.0')),
+        burst=int(os.getenv('FIPE_BURST', '2')),
+        grouped=os.getenv('FIPE_GROUPED', '0') == '1'
+    ) as scraper:
+        # Processa até 10 batches de 50 veículos (500 total)
+        scraper.run(max_batches=10, batch_size=50)
     
     print(f"\n📅 Término: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
\ No newline at end of file
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PREFETCH FIPE CATALOG
+Espelha o catálogo FIPE do mês de referência no cache local
+"""
+
+import sys
+import time
+from datetime import datetime
+
+from fipe_cache import FipeCache
+from fipe_history import PriceHistory
+from market_price_vehicles_scraper import FipeAPI
+
+
+DEFAULT_VEHICLE_TYPES = ('carros', 'motos', 'caminhoes')
+
+
+def prefetch_fipe_catalog(vehicle_types=DEFAULT_VEHICLE_TYPES, include_prices: bool = True):
+    """Baixa marcas, modelos, anos e preços de cada tipo para o cache"""
+    print("="*60)
+    print("📥 PREFETCH CATÁLOGO FIPE")
+    print("="*60)
+
+    start_time = time.time()
+    fipe = FipeAPI(cache=FipeCache(), history=PriceHistory())
+
+    ref = fipe.get_reference_table()
+    if not ref:
+        print("❌ Erro ao conectar com FIPE")
+        fipe.close()
+        return
+
+    print(f"   ✅ Referência: {ref}")
+
+    for vehicle_type in vehicle_types:
+        print(f"\n{'='*60}")
+        print(f"🚗 {vehicle_type.upper()}")
+        print(f"{'='*60}")
+
+        stats = fipe.prefetch_catalog(vehicle_type, include_prices=include_prices)
+
+        print(f"\n   • Marcas: {stats['brands']}")
+        print(f"   • Modelos: {stats['models']}")
+        print(f"   • Anos: {stats['years']}")
+        print(f"   • Preços: {stats['prices']}")
+        print(f"   • Erros: {stats['errors']}")
+
+        # Grava a série histórica a cada tipo (prefetch longo)
+        fipe.history.flush()
+
+    elapsed = time.time() - start_time
+
+    print(f"\n{'='*60}")
+    print(f"✅ PREFETCH CONCLUÍDO")
+    print(f"{'='*60}")
+    print(f"   💾 Cache: {fipe.cache.path}")
+    print(f"   ⏱️  Tempo: {elapsed/60:.1f}min")
+    print(f"{'='*60}")
+
+    fipe.close()
+    fipe.cache.close()
+
+
+if __name__ == "__main__":
+    print("="*60)
+    print(f"📅 Início: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("="*60)
+
+    # Tipos opcionais pela linha de comando (ex: motos carros)
+    types = tuple(sys.argv[1:]) or DEFAULT_VEHICLE_TYPES
+    prefetch_fipe_catalog(types)
+
+    print(f"\n📅 Término: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+REPLAY TRANSPORT
+Stand-in local da API FIPE e do PostgREST (/rest/v1/veiculos e RPCs) para benchmarks
+"""
+
+import re
+import json
+import time
+import random
+import threading
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit, parse_qsl
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+FIPE_PREFIX = 'https://veiculos.fipe.org.br'
+REPLAY_SUPABASE_URL = 'http://replay.local'
+
+
+def fipe_fixture_key(endpoint: str, data: Dict) -> str:
+    """
+    Chave de um request FIPE dentro do arquivo de fixtures
+
+    Ex: ConsultarAnoModelo -> "2:80:5" (tipo:marca:modelo)
+    """
+    tipo = data.get('codigoTipoVeiculo', '')
+
+    if endpoint == 'ConsultarAnoModeloPeloCodigoFipe':
+        parts = [tipo, 'codigo', data.get('modeloCodigoExterno')]
+    elif endpoint == 'ConsultarValorComTodosParametros' and data.get('tipoConsulta') == 'codigo':
+        parts = [
+            tipo, 'codigo', data.get('modeloCodigoExterno'),
+            f"{data.get('anoModelo')}-{data.get('codigoTipoCombustivel')}"
+        ]
+    elif endpoint == 'ConsultarMarcas':
+        parts = [tipo]
+    elif endpoint == 'ConsultarModelos':
+        parts = [tipo, data.get('codigoMarca')]
+    elif endpoint == 'ConsultarAnoModelo':
+        parts = [tipo, data.get('codigoMarca'), data.get('codigoModelo')]
+    elif endpoint == 'ConsultarValorComTodosParametros':
+        parts = [
+            tipo, data.get('codigoMarca'), data.get('codigoModelo'),
+            f"{data.get('anoModelo')}-{data.get('codigoTipoCombustivel')}"
+        ]
+    else:
+        parts = []
+
+    return ':'.join(str(p) for p in parts)
+
+
+# codigoTipoVeiculo -> vehicle_type
+VEHICLE_TYPES = {'1': 'carros', '2': 'motos', '3': 'caminhoes'}
+
+
+def _as_text(value) -> str:
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Separa condições por vírgula, fora de parênteses e aspas"""
+    items, depth, quoted, start = [], 0, False, 0
+
+    for i, char in enumerate(text):
+        if char == '"':
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            items.append(text[start:i])
+            start = i + 1
+
+    items.append(text[start:])
+    return [item for item in items if item]
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Adapter do requests que responde localmente
+
+    - FIPE: devolve respostas gravadas (fixtures) por endpoint/chave
+    - PostgREST: emula GET/PATCH/POST em /rest/v1/veiculos sobre uma lista em memória
+      e a RPC batch_update_market_prices (sql/batch_update_market_prices.sql)
+
+    Args:
+        fixtures: {endpoint: {chave: resposta}} (ver fipe_fixture_key)
+        vehicles: Linhas da tabela veiculos
+        latency: Latência média simulada por request (s)
+        throttle_rate: Probabilidade de responder 429 na FIPE
+        seed: Semente do gerador aleatório
+    """
+
+    LOGIC_RE = re.compile(r'^(?P<negate>not\.)?(?P<op>and|or)(?P<body>\(.*\))$')
+
+    def __init__(
+        self,
+        fixtures: Dict,
+        vehicles: Optional[List[Dict]] = None,
+        latency: float = 0.0,
+        throttle_rate: float = 0.0,
+        seed: int = 42
+    ):
+        super().__init__()
+        self.fixtures = fixtures
+        self.vehicles = vehicles or []
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.requests: Dict[str, int] = {}
+        self.latencies: Dict[str, List[float]] = {'fipe': [], 'supabase': []}
+
+    # ------------------------------------------------------------------
+    # requests.adapters.BaseAdapter
+    # ------------------------------------------------------------------
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        start = time.perf_counter()
+
+        with self._lock:
+            jitter = self._random.uniform(0.5, 1.5)
+            throttled = self._random.random() < self.throttle_rate
+
+        if self.latency:
+            time.sleep(self.latency * jitter)
+
+        parts = urlsplit(request.url)
+
+        if request.url.startswith(FIPE_PREFIX):
+            service = 'fipe'
+            endpoint = parts.path.rsplit('/', 1)[-1]
+
+            if throttled:
+                response = self._response(request, 429, {'erro': 'rate limit'})
+            else:
+                response = self._fipe(request, endpoint)
+        else:
+            service = 'supabase'
+            endpoint = f"{request.method} {parts.path}"
+            response = self._postgrest(request, parts)
+
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.requests[f"{service}:{endpoint}"] = self.requests.get(f"{service}:{endpoint}", 0) + 1
+            self.latencies[service].append(elapsed)
+
+        return response
+
+    def close(self):
+        pass
+
+    # ------------------------------------------------------------------
+    # FIPE
+    # ------------------------------------------------------------------
+
+    def _fipe(self, request, endpoint: str):
+        data = json.loads(request.body or b'{}')
+        responses = self.fixtures.get(endpoint)
+
+        if endpoint == 'ConsultarTabelaDeReferencia':
+            return self._response(request, 200, responses or [])
+
+        payload = (responses or {}).get(fipe_fixture_key(endpoint, data))
+
+        # Consultas por código FIPE derivadas das respostas gravadas por marca/modelo
+        if payload is None and 'modeloCodigoExterno' in data:
+            payload = self._fipe_by_code(endpoint, data)
+
+        if payload is None:
+            # A FIPE responde 200 com {"erro": ...} para combinações inexistentes
+            return self._response(request, 200, {'codigo': '0', 'erro': 'nadaencontrado'})
+
+        return self._response(request, 200, payload)
+
+    def _fipe_by_code(self, endpoint: str, data: Dict):
+        tipo = str(data.get('codigoTipoVeiculo', ''))
+        codigo = data.get('modeloCodigoExterno')
+
+        matches = {
+            key.split(':')[-1]: price
+            for key, price in self.fixtures.get('ConsultarValorComTodosParametros', {}).items()
+            if key.split(':')[0] == tipo and price.get('CodigoFipe') == codigo
+        }
+
+        if not matches:
+            return None
+
+        if endpoint == 'ConsultarAnoModeloPeloCodigoFipe':
+            return [
+                {'Label': f"{price.get('AnoModelo')} {price.get('Combustivel')}", 'Value': year_code}
+                for year_code, price in sorted(matches.items(), reverse=True)
+            ]
+
+        return matches.get(f"{data.get('anoModelo')}-{data.get('codigoTipoCombustivel')}")
+
+    # ------------------------------------------------------------------
+    # PostgREST
+    # ------------------------------------------------------------------
+
+    def _postgrest(self, request, parts):
+        params = dict(parse_qsl(parts.query, keep_blank_values=True))
+
+        if parts.path.endswith('/rpc/batch_update_market_prices') and request.method == 'POST':
+            return self._rpc_batch_update(request)
+
+        if not parts.path.endswith('/veiculos'):
+            return self._response(request, 404, {'message': 'not found'})
+
+        with self._lock:
+            if request.method == 'GET':
+                return self._get(request, params)
+
+            body = json.loads(request.body or b'null')
+
+            if request.method == 'PATCH':
+                for row in self._filter(self.vehicles, params):
+                    row.update(body)
+                return self._response(request, 204, None)
+
+            if request.method == 'POST':
+                by_id = {_as_text(row.get('id')): row for row in self.vehicles}
+                for item in body if isinstance(body, list) else [body]:
+                    row = by_id.get(_as_text(item.get('id')))
+                    if row is None:
+                        self.vehicles.append(dict(item))
+                    else:
+                        row.update(item)
+                return self._response(request, 201, None)
+
+        return self._response(request, 405, {'message': 'method not allowed'})
+
+    def _rpc_batch_update(self, request):
+        """UPDATE ... FROM jsonb_array_elements(payload): só linhas existentes, retorna os ids"""
+        payload = json.loads(request.body or b'{}').get('payload') or []
+        updated = []
+
+        with self._lock:
+            by_id = {_as_text(row.get('id')): row for row in self.vehicles}
+
+            for item in payload:
+                row = by_id.get(_as_text(item.get('id')))
+                if row is not None:
+                    row.update(item)
+                    updated.append({'id': row['id']})
+
+        return self._response(request, 200, updated)
+
+    def _get(self, request, params: Dict):
+        rows = self._filter(self.vehicles, params)
+        total = len(rows)
+
+        for field, direction in reversed(self._order(params.get('order'))):
+            rows = sorted(
+                rows,
+                key=lambda row: _as_text(row.get(field)),
+                reverse=(direction == 'desc')
+            )
+
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', total))
+        rows = rows[offset:offset + limit]
+
+        select = params.get('select', '*')
+        headers = {}
+
+        if select == 'count':
+            body = [{'count': total}]
+            headers['Content-Range'] = f"0-{max(total - 1, 0)}/{total}"
+        elif select == '*':
+            body = [dict(row) for row in rows]
+        else:
+            columns = [c.strip() for c in select.split(',')]
+            body = [{c: row.get(c) for c in columns} for row in rows]
+
+        return self._response(request, 200, body, headers)
+
+    @staticmethod
+    def _order(order: Optional[str]) -> List[tuple]:
+        if not order:
+            return []
+        result = []
+        for item in order.split(','):
+            field, _, direction = item.partition('.')
+            result.append((field, direction or 'asc'))
+        return result
+
+    def _filter(self, rows: List[Dict], params: Dict) -> List[Dict]:
+        skip = {'select', 'limit', 'offset', 'order', 'on_conflict'}
+        result = []
+
+        for row in rows:
+            ok = True
+
+            for field, expr in params.items():
+                if field in skip:
+                    continue
+
+                if field in ('and', 'or'):
+                    ok = self._logic(row, field, expr)
+                else:
+                    ok = self._match(self._value(row, field), expr)
+
+                if not ok:
+                    break
+
+            if ok:
+                result.append(row)
+
+        return result
+
+    def _logic(self, row: Dict, op: str, body: str) -> bool:
+        """Avalia and=(...) / or=(...), com grupos aninhados"""
+        results = []
+
+        for item in _split_top_level(body[1:-1]):
+            match = self.LOGIC_RE.match(item)
+
+            if match:
+                ok = self._logic(row, match.group('op'), match.group('body'))
+                ok = not ok if match.group('negate') else ok
+            else:
+                field, _, expr = item.partition('.')
+                ok = self._match(self._value(row, field), expr)
+
+            results.append(ok)
+
+        return all(results) if op == 'and' else any(results)
+
+    @staticmethod
+    def _value(row: Dict, field: str):
+        """Valor de uma coluna, inclusive caminhos JSON (coluna->chave, coluna->>chave)"""
+        column, *path = re.split(r'->>?', field)
+        value = row.get(column)
+
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+
+        return value
+
+    @staticmethod
+    def _match(value, expr: str) -> bool:
+        negate = expr.startswith('not.')
+        if negate:
+            expr = expr[4:]
+
+        op, _, operand = expr.partition('.')
+
+        if op == 'is':
+            ok = _as_text(value) == operand
+        elif op == 'eq':
+            ok = _as_text(value) == _unquote(operand)
+        elif op == 'neq':
+            # NULL <> x não é verdadeiro no Postgres
+            ok = value is not None and _as_text(value) != _unquote(operand)
+        elif op == 'lt':
+            ok = _as_text(value) < _unquote(operand)
+        elif op == 'in':
+            options = {_unquote(o) for o in operand.strip('()').split(',')}
+            ok = _as_text(value) in options
+        else:
+            ok = True
+
+        return ok != negate
+
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _response(request, status: int, payload, headers: Optional[Dict] = None):
+        response = requests.Response()
+        response.status_code = status
+        response.request = request
+        response.url = request.url
+        response.encoding = 'utf-8'
+        response.headers = CaseInsensitiveDict({'Content-Type': 'application/json', **(headers or {})})
+        response._content = b'' if payload is None else json.dumps(payload).encode('utf-8')
+        return response
+
+
+class FixtureAnalyzer:
+    """
+    Analyzer mínimo para rodar o scraper sobre as fixtures
+
+    Lê marca, modelo e ano de `normalized_title` ("HONDA CG 160 FAN 2023")
+    e o tipo pela lista de marcas gravada em ConsultarMarcas.
+    """
+
+    def __init__(self, fixtures: Dict):
+        self.types: Dict[str, str] = {}
+
+        for tipo, brands in fixtures.get('ConsultarMarcas', {}).items():
+            for brand in brands:
+                self.types.setdefault(brand['Label'].split()[0].upper(), VEHICLE_TYPES.get(str(tipo), 'carros'))
+
+    def analyze(self, vehicle: Dict) -> Dict:
+        words = (vehicle.get('normalized_title') or vehicle.get('title') or '').upper().split()
+        year = int(words.pop()) if words and words[-1].isdigit() else None
+        brand = words[0] if words else None
+
+        return {
+            'brand': brand,
+            'model': ' '.join(words[1:]) or None,
+            'year_model': year,
+            'vehicle_type': self.types.get(brand, 'carros'),
+            'confidence': 'high',
+        }
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    Adapter que repassa os requests para a FIPE real e grava as respostas
+    no formato de fixtures usado pelo ReplayAdapter
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fixtures: Dict = {}
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 200 and request.url.startswith(FIPE_PREFIX):
+            endpoint = urlsplit(request.url).path.rsplit('/', 1)[-1]
+            data = json.loads(request.body or b'{}')
+            payload = response.json()
+
+            with self._lock:
+                if endpoint == 'ConsultarTabelaDeReferencia':
+                    self.fixtures[endpoint] = payload
+                else:
+                    self.fixtures.setdefault(endpoint, {})[fipe_fixture_key(endpoint, data)] = payload
+
+        return response
+
+    def save(self, path: str, vehicles: Optional[List[Dict]] = None):
+        """Grava fixtures (e opcionalmente veículos) em JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({**self.fixtures, 'veiculos': vehicles or []}, f, ensure_ascii=False, indent=1)
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+REPRICE MARKET PRICES
+Reprecifica veículos já precificados quando sai uma nova tabela FIPE
+
+Agrupa os anúncios por código FIPE + ano, consulta cada código uma única vez
+pela consulta direta por código (ou lê da série histórica, se o preço do mês
+já foi baixado) e grava só os anúncios cujo preço mudou. Os demais só recebem
+a nova referência no metadata, para não serem relidos na próxima execução.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from fipe_cache import FipeCache
+from fipe_history import PriceHistory
+from market_price_supabase_client import MarketPriceSupabaseClient, VehicleFetchError
+from market_price_vehicles_scraper import FipeAPI
+
+
+# Colunas necessárias para reprecificar
+PRICED_COLUMNS = 'id,market_price,market_price_confidence,market_price_metadata,vehicle_type'
+
+# Diferença mínima (R$) para regravar um preço
+PRICE_EPSILON = 0.01
+
+
+def _group_key(row: Dict) -> Optional[tuple]:
+    """(tipo, marca, modelo, código FIPE, código do ano, ano) de um anúncio precificado"""
+    metadata = row.get('market_price_metadata') or {}
+
+    if not metadata.get('codigo_fipe'):
+        return None
+
+    return (
+        row.get('vehicle_type') or 'carros',
+        metadata.get('marca_fipe'),
+        metadata.get('modelo_fipe'),
+        metadata['codigo_fipe'],
+        metadata.get('ano_codigo_fipe'),
+        metadata.get('ano_fipe'),
+    )
+
+
+def _resolve_group(fipe: FipeAPI, history: PriceHistory, key: tuple, ref: int) -> Optional[Dict]:
+    """
+    Preço atual de um grupo
+
+    Série histórica primeiro; depois consulta direta pelo código FIPE e,
+    se ela falhar, pelos labels de marca/modelo gravados.
+    """
+    vehicle_type, brand_label, model_label, codigo_fipe, year_code, year = key
+
+    if year_code:
+        valor = history.get(codigo_fipe, year_code, ref)
+        if valor is not None:
+            return {
+                'valor': valor,
+                'codigo_fipe': codigo_fipe,
+                'ano_codigo': year_code,
+                'mes_referencia': history.labels.get(ref),
+                'tabela_referencia': ref,
+            }
+
+    data = fipe.get_price_by_code(codigo_fipe, vehicle_type, year_code=year_code, year=year)
+
+    if not data or not data.get('valor'):
+        data = fipe.get_price_by_labels(brand_label, model_label, year_code, vehicle_type, year=year)
+
+    # Label reaproveitado por outro código (ex: modelo renomeado): não arrisca
+    if not data or not data.get('valor') or data.get('codigo_fipe') != codigo_fipe:
+        return None
+
+    return data
+
+
+def reprice_market_prices(
+    batch_size: int = 500,
+    max_rows: Optional[int] = None,
+    workers: int = 1,
+    dry_run: bool = False
+) -> Dict:
+    """
+    Reprecifica anúncios com market_price de referências anteriores
+
+    O filtro por referência é feito no PostgREST: anúncios já na referência
+    atual não são lidos.
+
+    Args:
+        batch_size: Registros por página / por gravação em bulk
+        max_rows: Limite de anúncios lidos (padrão: todos)
+        workers: Códigos consultados em paralelo
+        dry_run: Só calcula as diferenças, sem gravar
+
+    Returns:
+        Estatísticas da execução
+    """
+    print("="*60)
+    print("🔁 REPRECIFICAÇÃO MARKET PRICE")
+    print("="*60)
+
+    start_time = time.time()
+
+    db_client = MarketPriceSupabaseClient()
+    history = PriceHistory()
+    fipe = FipeAPI(
+        cache=FipeCache(),
+        rate=float(os.getenv('FIPE_RATE', '2.0')),
+        burst=int(os.getenv('FIPE_BURST', '2')),
+        history=history
+    )
+
+    stats = {
+        'rows': 0,
+        'unidentified': 0,
+        'codes': 0,
+        'codes_changed': 0,
+        'codes_missing': 0,
+        'unchanged': 0,
+        'stamped': 0,
+        'updated': 0,
+        'errors': 0,
+    }
+
+    ref = fipe.get_reference_table()
+    if not ref:
+        print("❌ Erro ao conectar com FIPE")
+        fipe.close()
+        db_client.close()
+        return stats
+
+    print(f"   ✅ Referência: {ref}")
+
+    # 1. Agrupa os anúncios desatualizados por código FIPE + ano
+    groups: Dict[tuple, List[Dict]] = {}
+
+    # Só anúncios de referências anteriores (ou sem referência) saem do banco
+    pages = db_client.stream_vehicles(
+        'veiculos',
+        filters={
+            'market_price': 'not.is.null',
+            'or': (
+                '(market_price_metadata->>tabela_referencia.is.null,'
+                f'market_price_metadata->>tabela_referencia.neq.{ref})'
+            ),
+        },
+        columns=PRICED_COLUMNS,
+        page_size=batch_size
+    )
+
+    try:
+        for rows in pages:
+            for row in rows:
+                stats['rows'] += 1
+
+                key = _group_key(row)
+                if key is None:
+                    stats['unidentified'] += 1
+                    continue
+
+                groups.setdefault(key, []).append(row)
+
+            if max_rows and stats['rows'] >= max_rows:
+                pages.close()
+                break
+    except VehicleFetchError:
+        # Reprecifica o que foi lido; o restante fica para a próxima execução
+        stats['errors'] += 1
+
+    stats['codes'] = len(groups)
+    print(f"   📋 {stats['rows']} anúncios lidos, {stats['codes']} códigos FIPE a consultar")
+
+    # 2. Uma consulta por código
+    def resolve(item):
+        key, _ = item
+        try:
+            return key, _resolve_group(fipe, history, key, ref)
+        except Exception as e:
+            print(f"   ❌ Erro em {key[3]}: {str(e)[:50]}")
+            return key, None
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            prices = dict(executor.map(resolve, groups.items()))
+    else:
+        prices = dict(map(resolve, groups.items()))
+
+    # 3. Diferença contra o preço gravado; só o que mudou é regravado,
+    #    o restante só recebe a nova referência no metadata
+    updates: List[Dict] = []
+    stamps: List[Dict] = []
+
+    for key, rows in groups.items():
+        fipe_data = prices.get(key)
+
+        if not fipe_data:
+            stats['codes_missing'] += 1
+            continue
+
+        _, _, _, codigo_fipe, year_code, _ = key
+        previous = history.get(codigo_fipe, year_code, ref - 1) if year_code else None
+
+        if previous is not None and abs(previous - fipe_data['valor']) >= PRICE_EPSILON:
+            stats['codes_changed'] += 1
+
+        for row in rows:
+            metadata = dict(row.get('market_price_metadata') or {})
+            metadata.update({
+                'mes_referencia': fipe_data.get('mes_referencia') or metadata.get('mes_referencia'),
+                'tabela_referencia': ref,
+                'ano_codigo_fipe': fipe_data.get('ano_codigo') or year_code,
+            })
+
+            if abs((row.get('market_price') or 0) - fipe_data['valor']) < PRICE_EPSILON:
+                stats['unchanged'] += 1
+                stamps.append({'id': row['id'], 'market_price_metadata': metadata})
+                continue
+
+            metadata['preco_anterior'] = row.get('market_price')
+
+            updates.append({
+                'id': row['id'],
+                'market_price': fipe_data['valor'],
+                'market_price_source': 'fipe',
+                'market_price_confidence': row.get('market_price_confidence') or 'medium',
+                'market_price_metadata': metadata,
+            })
+
+    print(f"   💱 {len(updates)} anúncios com preço alterado, {len(stamps)} só com a nova referência")
+
+    # 4. Gravação em bulk (preço completo / só metadata)
+    if not dry_run:
+        for start in range(0, len(updates), batch_size):
+            result = db_client.batch_update_market_prices('veiculos', updates[start:start + batch_size])
+            stats['updated'] += result['success']
+            stats['errors'] += result['errors']
+
+        for start in range(0, len(stamps), batch_size):
+            result = db_client.batch_update_rows('veiculos', stamps[start:start + batch_size])
+            stats['stamped'] += result['success']
+            stats['errors'] += result['errors']
+
+    history.flush()
+    fipe.close()
+    db_client.close()
+
+    elapsed = time.time() - start_time
+
+    print(f"\n{'='*60}")
+    print(f"✅ REPRECIFICAÇÃO CONCLUÍDA{' (dry-run)' if dry_run else ''}")
+    print(f"{'='*60}")
+    print(f"   • Anúncios lidos: {stats['rows']}")
+    print(f"   • Sem identificação FIPE: {stats['unidentified']}")
+    print(f"   • Códigos consultados: {stats['codes']} ({stats['codes_missing']} sem preço)")
+    print(f"   • Códigos com preço alterado: {stats['codes_changed']}")
+    print(f"   • Sem alteração: {stats['unchanged']} ({stats['stamped']} com a nova referência)")
+    print(f"   • Atualizados: {stats['updated']}")
+    print(f"   • Erros: {stats['errors']}")
+
+    if fipe.cache:
+        print(f"\n   💾 Cache FIPE: {fipe.cache.hits} hits / {fipe.cache.misses} misses")
+
+    print(f"   ⏱️  Tempo: {elapsed/60:.1f}min")
+    print(f"{'='*60}")
+
+    return stats
+
+
+if __name__ == "__main__":
+    print("="*60)
+    print(f"📅 Início: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("="*60)
+
+    reprice_market_prices(
+        workers=int(os.getenv('FIPE_WORKERS', '1')),
+        dry_run=os.getenv('REPRICE_DRY_RUN', '0') == '1'
+    )
+
+    print(f"\n📅 Término: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RUN JOURNAL
+Journal local (JSONL, append-only) do resultado de cada veículo e do cursor
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Dict, Optional, Tuple
+
+
+DEFAULT_JOURNAL_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '.cache',
+    'market_price_journal.jsonl'
+)
+
+
+class RunJournal:
+    """
+    Checkpoint das execuções do scraper de market price
+
+    Cada linha é um evento:
+    - {"type": "vehicle", "id", "outcome", "reason", "ref", "ts"}
+      outcome: priced | not_found | error
+    - {"type": "cursor", "cursor": [created_at, id], "ref", "ts"}
+      última página processada por completo
+    - {"type": "done", "ref", "ts"}
+      fim dos registros (a próxima execução recomeça do início)
+    - {"type": "stop", "ref", "ts"}
+      parada normal no limite de páginas (a próxima execução também
+      recomeça do início; o cursor só vale após uma execução interrompida)
+
+    Ao abrir, o arquivo é relido e só o último evento de cada veículo vale.
+    Veículos `not_found` são pulados enquanto a tabela de referência FIPE
+    for a mesma em que a busca falhou. A compactação descarta `priced` e
+    eventos de referências anteriores, que não influenciam mais nada.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('MARKET_PRICE_JOURNAL_PATH') or DEFAULT_JOURNAL_PATH
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.outcomes: Dict[str, Dict] = {}
+        self.cursor: Optional[Dict] = None
+        self.ref: Optional[int] = None
+        self.skipped = 0
+
+        self._lock = threading.Lock()
+        lines = self._load()
+
+        # Reescreve o arquivo quando a maior parte das linhas já foi superada
+        if lines > 2 * (len(self._live_outcomes()) + 1) and lines > 1000:
+            self.compact()
+
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _load(self) -> int:
+        if not os.path.exists(self.path):
+            return 0
+
+        lines = 0
+
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                lines += 1
+
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # Linha truncada (job interrompido no meio da escrita)
+                    continue
+
+                kind = event.get('type')
+
+                # Referência FIPE mais recente registrada
+                if event.get('ref') is not None:
+                    self.ref = event['ref']
+
+                if kind == 'vehicle':
+                    self.outcomes[str(event['id'])] = event
+                elif kind == 'cursor':
+                    self.cursor = event
+                elif kind in ('done', 'stop'):
+                    self.cursor = None
+
+        return lines
+
+    def _append(self, event: Dict):
+        event['ts'] = round(time.time(), 3)
+        line = json.dumps(event, ensure_ascii=False, separators=(',', ':'))
+
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+            if event.get('ref') is not None:
+                self.ref = event['ref']
+
+    def _live_outcomes(self) -> Dict[str, Dict]:
+        """Eventos que ainda valem: não precificados, na referência mais recente"""
+        return {
+            vehicle_id: event
+            for vehicle_id, event in self.outcomes.items()
+            if event['outcome'] != 'priced' and event.get('ref') == self.ref
+        }
+
+    def compact(self):
+        """Reescreve o journal só com os eventos que ainda valem e o cursor"""
+        tmp_path = self.path + '.tmp'
+        self.outcomes = self._live_outcomes()
+
+        if self.cursor and self.cursor.get('ref') != self.ref:
+            self.cursor = None
+
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for event in self.outcomes.values():
+                f.write(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n')
+            if self.cursor:
+                f.write(json.dumps(self.cursor, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+        os.replace(tmp_path, self.path)
+
+    # ------------------------------------------------------------------
+    # Veículos
+    # ------------------------------------------------------------------
+
+    def record(self, vehicle_id, outcome: str, reason: Optional[str] = None, ref: Optional[int] = None):
+        """Registra o resultado de um veículo"""
+        event = {
+            'type': 'vehicle',
+            'id': str(vehicle_id),
+            'outcome': outcome,
+            'reason': reason,
+            'ref': ref,
+        }
+        self._append(event)
+
+        with self._lock:
+            self.outcomes[event['id']] = event
+
+    def known_not_found(self, vehicle_id, ref: Optional[int]) -> Optional[str]:
+        """
+        Motivo do último `not_found` do veículo na mesma referência
+
+        Returns:
+            Motivo (ex: 'model_not_found') ou None se o veículo deve ser buscado
+        """
+        reason = self.not_found_reason(vehicle_id, ref)
+
+        if reason:
+            with self._lock:
+                self.skipped += 1
+
+        return reason
+
+    def not_found_reason(self, vehicle_id, ref: Optional[int]) -> Optional[str]:
+        """Como known_not_found, sem contar o veículo como pulado"""
+        with self._lock:
+            event = self.outcomes.get(str(vehicle_id))
+
+        if not event or event['outcome'] != 'not_found' or event.get('ref') != ref:
+            return None
+
+        return event.get('reason') or 'not_found'
+
+    # ------------------------------------------------------------------
+    # Cursor
+    # ------------------------------------------------------------------
+
+    def resume_cursor(self, ref: Optional[int]) -> Optional[Tuple[str, str]]:
+        """
+        Cursor da última execução interrompida
+
+        Execuções encerradas normalmente (stop/done) não deixam cursor: a
+        próxima começa do início, onde ficam os anúncios novos. Uma nova
+        referência também recomeça do início, para rebuscar os veículos que
+        não foram encontrados na anterior.
+        """
+        if not self.cursor or self.cursor.get('ref') != ref:
+            return None
+
+        return tuple(self.cursor['cursor'])
+
+    def save_cursor(self, cursor: Tuple[str, str], ref: Optional[int]):
+        """Registra a última linha de uma página processada por completo"""
+        event = {'type': 'cursor', 'cursor': list(cursor), 'ref': ref}
+        self._append(event)
+        self.cursor = event
+
+    def finish(self, ref: Optional[int]):
+        """Fim dos registros: a próxima execução recomeça do início"""
+        self._append({'type': 'done', 'ref': ref})
+        self.cursor = None
+
+    def stop(self, ref: Optional[int]):
+        """Parada normal no limite de páginas: a próxima execução recomeça do início"""
+        self._append({'type': 'stop', 'ref': ref})
+        self.cursor = None
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RUN METRICS
+Instrumentação por estágio (contadores + histogramas) com export JSON/Prometheus
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+
+# Limites dos buckets (segundos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def to_dict(self) -> Dict:
+        cumulative = []
+        total = 0
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'avg': round(self.sum / self.count, 6) if self.count else 0.0,
+            'max': round(self.max, 6),
+            'buckets': {str(b): c for b, c in zip(self.buckets, cumulative)},
+        }
+
+
+class RunMetrics:
+    """
+    Métricas de uma execução
+
+    - incr(nome, **labels): contadores
+    - observe(nome, segundos, **labels) / timer(nome, **labels): histogramas de tempo
+    - sleep(segundos, motivo): dorme registrando o tempo parado
+    """
+
+    def __init__(self, prefix: str = 'market_price', buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self.started_at = time.time()
+
+        self.counters: Dict[tuple, float] = {}
+        self.histograms: Dict[tuple, _Histogram] = {}
+        self.gauges: Dict[tuple, float] = {}
+
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: Dict) -> tuple:
+        return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+    def incr(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = _Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def sleep(self, seconds: float, reason: str):
+        """time.sleep registrado em sleep_seconds{reason=...}"""
+        if seconds <= 0:
+            return
+        time.sleep(seconds)
+        self.observe('sleep_seconds', seconds, reason=reason)
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> Dict:
+        """
+        Relatório completo em dict
+
+        `sleep_seconds_total` soma o tempo parado de todas as threads, então
+        `sleep_ratio` (parado / tempo de parede) pode passar de 1 com workers > 1.
+        """
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {k: h.to_dict() for k, h in self.histograms.items()}
+            gauges = dict(self.gauges)
+
+        def fmt(key):
+            name, labels = key
+            if not labels:
+                return name
+            return name + '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+        wall = time.time() - self.started_at
+        slept = sum(h['sum'] for (name, _), h in histograms.items() if name == 'sleep_seconds')
+
+        return {
+            'started_at': self.started_at,
+            'wall_seconds': round(wall, 3),
+            'sleep_seconds_total': round(slept, 3),
+            'sleep_ratio': round(slept / wall, 4) if wall > 0 else 0.0,
+            'counters': {fmt(k): v for k, v in sorted(counters.items())},
+            'gauges': {fmt(k): v for k, v in sorted(gauges.items())},
+            'histograms': {fmt(k): v for k, v in sorted(histograms.items())},
+        }
+
+    def export_json(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
+
+    def export_prometheus(self, path: str):
+        """Formato textfile do node_exporter"""
+        def labels_str(labels, extra=()):
+            items = list(labels) + list(extra)
+            if not items:
+                return ''
+            return '{' + ','.join(f'{k}="{v}"' for k, v in items) + '}'
+
+        with self._lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            histograms = {k: h.to_dict() for k, h in self.histograms.items()}
+
+        lines = []
+        typed = set()
+
+        for (name, labels), value in sorted(counters.items()):
+            metric = f"{self.prefix}_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{labels_str(labels)} {value}")
+
+        for (name, labels), value in sorted(gauges.items()):
+            metric = f"{self.prefix}_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} gauge")
+                typed.add(metric)
+            lines.append(f"{metric}{labels_str(labels)} {value}")
+
+        for (name, labels), histogram in sorted(histograms.items()):
+            metric = f"{self.prefix}_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            for bound, count in histogram['buckets'].items():
+                lines.append(f"{metric}_bucket{labels_str(labels, [('le', bound)])} {count}")
+            lines.append(f"{metric}_bucket{labels_str(labels, [('le', '+Inf')])} {histogram['count']}")
+            lines.append(f"{metric}_sum{labels_str(labels)} {histogram['sum']}")
+            lines.append(f"{metric}_count{labels_str(labels)} {histogram['count']}")
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def export(self, directory: str, name: str) -> Tuple[str, str]:
+        """Grava <name>.json e <name>.prom em `directory`"""
+        os.makedirs(directory, exist_ok=True)
+
+        json_path = os.path.join(directory, f"{name}.json")
+        prom_path = os.path.join(directory, f"{name}.prom")
+
+        self.export_json(json_path)
+        self.export_prometheus(prom_path)
+
+        return json_path, prom_path
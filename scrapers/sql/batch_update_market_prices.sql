@@ -0,0 +1,38 @@
+-- BATCH UPDATE MARKET PRICES
+-- Gravação em bulk de market_price (MarketPriceSupabaseClient.batch_update_rows)
+--
+-- POST /rest/v1/rpc/batch_update_market_prices  {"payload": [{"id": ..., "market_price": ...}, ...]}
+--
+-- Atualiza só veículos existentes (nunca insere). Colunas ausentes em uma
+-- linha mantêm o valor atual, então linhas com colunas diferentes podem ir
+-- no mesmo payload. Retorna os ids atualizados: um id fora do retorno não
+-- foi gravado e conta como erro no cliente.
+
+create or replace function auctions.batch_update_market_prices(payload jsonb)
+returns table (id uuid)
+language sql
+security invoker
+as $$
+    update auctions.veiculos as v
+    set
+        market_price = case when u.data ? 'market_price'
+            then (u.data->>'market_price')::numeric else v.market_price end,
+        market_price_source = case when u.data ? 'market_price_source'
+            then u.data->>'market_price_source' else v.market_price_source end,
+        market_price_updated_at = case when u.data ? 'market_price_updated_at'
+            then (u.data->>'market_price_updated_at')::timestamptz else v.market_price_updated_at end,
+        market_price_confidence = case when u.data ? 'market_price_confidence'
+            then u.data->>'market_price_confidence' else v.market_price_confidence end,
+        market_price_metadata = case when u.data ? 'market_price_metadata'
+            then u.data->'market_price_metadata' else v.market_price_metadata end,
+        vehicle_type = case when u.data ? 'vehicle_type'
+            then u.data->>'vehicle_type' else v.vehicle_type end
+    from jsonb_array_elements(payload) as u(data)
+    where v.id = (u.data->>'id')::uuid
+    returning v.id;
+$$;
+
+grant execute on function auctions.batch_update_market_prices(jsonb) to service_role;
+
+-- Recarrega o cache de schema do PostgREST
+notify pgrst, 'reload schema';
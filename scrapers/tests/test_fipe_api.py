@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do FipeAPI contra o stand-in local (ReplayAdapter)
+
+Ex (de dentro de scrapers/):
+    python -m unittest discover -s tests
+"""
+
+import os
+import json
+import tempfile
+import unittest
+
+from fipe_cache import FipeCache
+from fipe_history import PriceHistory
+from market_price_vehicles_scraper import FipeAPI
+from replay_transport import FIPE_PREFIX, ReplayAdapter
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fixtures', 'fipe_replay.json')
+
+
+class FipeAPITest(unittest.TestCase):
+
+    def setUp(self):
+        with open(FIXTURES, encoding='utf-8') as f:
+            fixtures = json.load(f)
+        fixtures.pop('veiculos', None)
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.adapter = ReplayAdapter(fixtures)
+        self.fipe = FipeAPI(
+            cache=FipeCache(os.path.join(self.tmp.name, 'cache.sqlite3')),
+            rate=1000,
+            burst=100,
+            history=PriceHistory(os.path.join(self.tmp.name, 'history'))
+        )
+        self.fipe.session.mount(FIPE_PREFIX, self.adapter)
+
+    def tearDown(self):
+        self.fipe.close()
+        self.fipe.cache.close()
+        self.tmp.cleanup()
+
+    def test_lookup_without_vehicle_type_searches_as_carros(self):
+        # Analyzer sem tipo ("Tipo não identificado")
+        result, reason = self.fipe.lookup_vehicle_price('FIAT', 'UNO VIVACE 1.0', 2016, None)
+
+        self.assertIsNone(reason)
+        self.assertTrue(result['valor'])
+        self.assertEqual(
+            self.fipe.lookup_key('FIAT', 'UNO VIVACE 1.0', 2016, None),
+            self.fipe.lookup_key('FIAT', 'UNO VIVACE 1.0', 2016, 'carros')
+        )
+
+    def test_price_by_code_resolves_year_in_the_requested_reference(self):
+        ref = self.fipe.get_reference_table()
+        sent = []
+        send = self.adapter.send
+
+        def record(request, **kwargs):
+            if request.url.endswith('ConsultarAnoModeloPeloCodigoFipe'):
+                sent.append(json.loads(request.body)['codigoTabelaReferencia'])
+            return send(request, **kwargs)
+
+        self.adapter.send = record
+
+        self.fipe.get_price_by_code('800007-1', 'carros', year=2024, ref_table=ref - 1)
+        self.fipe.get_price_by_code('800007-1', 'carros', year=2024)
+
+        # Uma consulta por referência: o cache não mistura códigos de ano entre tabelas
+        self.assertEqual(sent, [ref - 1, ref])
+
+
+if __name__ == '__main__':
+    unittest.main()
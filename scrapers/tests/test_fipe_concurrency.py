@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes das primitivas de concorrência (SingleFlight)
+
+Ex (de dentro de scrapers/):
+    python -m unittest discover -s tests
+"""
+
+import time
+import threading
+import unittest
+
+from fipe_concurrency import SingleFlight
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def test_follower_sees_leader_exception(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def leader_func():
+            started.set()
+            release.wait(5)
+            raise RuntimeError("falha no líder")
+
+        def run(func):
+            try:
+                flight.do('key', func)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        leader = threading.Thread(target=run, args=(leader_func,))
+        leader.start()
+        started.wait(5)
+
+        # Chega durante a execução do líder e fica aguardando
+        follower = threading.Thread(target=run, args=(lambda: (('não', 'usado'), True),))
+        follower.start()
+
+        while flight.hits == 0:
+            time.sleep(0.01)
+
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(errors, ["falha no líder", "falha no líder"])
+
+        # Nada foi memorizado: a próxima chamada executa de novo
+        self.assertEqual(flight.do('key', lambda: ('ok', True)), 'ok')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes da configuração de retry das sessões HTTP
+
+Ex (de dentro de scrapers/):
+    python -m unittest discover -s tests
+"""
+
+import unittest
+
+from http_transport import TransportConfig
+from market_price_vehicles_scraper import FipeAPI
+
+
+class TransportRetryTest(unittest.TestCase):
+
+    def test_non_idempotent_verbs_are_not_retried_after_sending(self):
+        config = TransportConfig(retries=2, status_forcelist=(502, 503, 504))
+        retry = config.build_session().get_adapter('https://example.com').max_retries
+
+        self.assertTrue(retry.is_retry('GET', 503))
+        self.assertFalse(retry.is_retry('POST', 503))
+        self.assertFalse(retry.is_retry('PATCH', 503))
+
+    def test_fipe_retries_only_in_request_loop(self):
+        fipe = FipeAPI(transport=TransportConfig(retries=2))
+        try:
+            retry = fipe.session.get_adapter(fipe.BASE_URL).max_retries
+            self.assertEqual(retry.total, 0)
+            self.assertEqual(retry.connect, 0)
+        finally:
+            fipe.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
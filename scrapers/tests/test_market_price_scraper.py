@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do MarketPriceScraper contra o stand-in local (ReplayAdapter)
+
+Ex (de dentro de scrapers/):
+    python -m unittest discover -s tests
+"""
+
+import io
+import os
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from replay_transport import FIPE_PREFIX, REPLAY_SUPABASE_URL, FixtureAnalyzer, ReplayAdapter
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fixtures', 'fipe_replay.json')
+
+
+class MarketPriceScraperTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(FIXTURES, encoding='utf-8') as f:
+            self.fixtures = json.load(f)
+        vehicles = self.fixtures.pop('veiculos')
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = dict(os.environ)
+        os.environ.update({
+            'SUPABASE_URL': REPLAY_SUPABASE_URL,
+            'SUPABASE_SERVICE_ROLE_KEY': 'replay',
+            'FIPE_CACHE_PATH': os.path.join(self.tmp.name, 'fipe_cache.sqlite3'),
+            'MARKET_PRICE_JOURNAL_PATH': os.path.join(self.tmp.name, 'journal.jsonl'),
+            'FIPE_HISTORY_DIR': os.path.join(self.tmp.name, 'history'),
+            'MARKET_PRICE_METRICS_DIR': os.path.join(self.tmp.name, 'metrics'),
+        })
+
+        self.adapter = ReplayAdapter(self.fixtures, vehicles=[dict(v) for v in vehicles])
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.env)
+        self.tmp.cleanup()
+
+    def _run(self, max_batches: int, batch_size: int = 20, default_analyzer: bool = False) -> dict:
+        from market_price_vehicles_scraper import MarketPriceScraper
+
+        analyzer = None if default_analyzer else FixtureAnalyzer(self.fixtures)
+
+        with MarketPriceScraper(rate=1000, burst=100, analyzer=analyzer) as scraper:
+            scraper.fipe.session.mount(FIPE_PREFIX, self.adapter)
+            scraper.db_client.session.mount(REPLAY_SUPABASE_URL, self.adapter)
+
+            with redirect_stdout(io.StringIO()):
+                scraper.run(max_batches=max_batches, batch_size=batch_size)
+
+            return scraper.stats
+
+    def test_new_listing_is_priced_after_a_run_stopped_at_max_batches(self):
+        self._run(max_batches=1)
+
+        # Anúncio novo: created_at mais recente, entra no topo da ordenação
+        new = dict(self.adapter.vehicles[0])
+        new.update({
+            'id': '00000000-0000-0000-0000-00000000ffff',
+            'created_at': '2026-12-31T00:00:00+00:00',
+            'market_price': None,
+        })
+        self.adapter.vehicles.append(new)
+
+        self._run(max_batches=1)
+
+        self.assertIsNotNone(new['market_price'])
+
+    def test_interrupted_run_resumes_from_cursor(self):
+        from run_journal import RunJournal
+
+        # Execução interrompida depois de gravar o cursor da linha 40 (sem stop/done)
+        ref = self.fixtures['ConsultarTabelaDeReferencia'][0]['Codigo']
+        journal = RunJournal()
+        journal.save_cursor(('2026-10-07T12:00:00+00:00', '00000000-0000-0000-0000-000000000040'), ref)
+        journal.close()
+
+        stats = self._run(max_batches=10)
+
+        # Só as linhas após o cursor (ids 00..39) são lidas
+        self.assertEqual(stats['processed'], 40)
+        self.assertIsNone(self.adapter.vehicles[59]['market_price'])
+
+        # Terminou normalmente: a próxima execução começa do início
+        journal = RunJournal()
+        self.assertIsNone(journal.resume_cursor(ref))
+        journal.close()
+
+    def test_default_analyzer_prices_the_fixtures(self):
+        stats = self._run(max_batches=10, default_analyzer=True)
+        priced = [v for v in self.adapter.vehicles if v['market_price'] is not None]
+
+        self.assertEqual(stats['processed'], len(self.adapter.vehicles))
+        self.assertTrue(priced)
+        self.assertEqual({v['vehicle_type'] for v in priced}, {'carros', 'motos', 'caminhoes'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do MarketPriceSupabaseClient contra o stand-in local (ReplayAdapter)
+
+Ex (de dentro de scrapers/):
+    python -m unittest discover -s tests
+"""
+
+import os
+import unittest
+
+from requests.adapters import BaseAdapter
+
+from market_price_supabase_client import MarketPriceSupabaseClient
+from replay_transport import REPLAY_SUPABASE_URL, ReplayAdapter
+
+
+class _MalformedRPC(BaseAdapter):
+    """Responde 200 com corpo inesperado na RPC; o resto vai para o ReplayAdapter"""
+
+    def __init__(self, replay: ReplayAdapter, body: bytes):
+        super().__init__()
+        self.replay = replay
+        self.body = body
+
+    def send(self, request, **kwargs):
+        if '/rpc/' in request.url:
+            response = ReplayAdapter._response(request, 200, None)
+            response._content = self.body
+            return response
+        return self.replay.send(request, **kwargs)
+
+    def close(self):
+        pass
+
+
+class SupabaseClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.env = dict(os.environ)
+        os.environ.update({'SUPABASE_URL': REPLAY_SUPABASE_URL, 'SUPABASE_SERVICE_ROLE_KEY': 'replay'})
+
+        self.replay = ReplayAdapter({}, vehicles=[
+            {'id': f'00000000-0000-0000-0000-00000000000{i}', 'market_price': None}
+            for i in range(3)
+        ])
+        self.client = MarketPriceSupabaseClient()
+
+    def tearDown(self):
+        self.client.close()
+        os.environ.clear()
+        os.environ.update(self.env)
+
+    def test_malformed_rpc_response_falls_back_to_patch(self):
+        rows = [{'id': v['id'], 'market_price': 10.0} for v in self.replay.vehicles]
+
+        for body in (b'not json', b'{"id": 1}', b'[{"uuid": 1}]'):
+            with self.subTest(body=body):
+                self.client.session.mount(REPLAY_SUPABASE_URL, _MalformedRPC(self.replay, body))
+
+                result = self.client.batch_update_rows('veiculos', rows)
+
+                self.assertEqual(result['success'], 3)
+                self.assertTrue(self.client._bulk_rpc_supported)
+                self.assertEqual(self.replay.requests.get('supabase:PATCH /rest/v1/veiculos'), 3)
+                self.replay.requests.clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
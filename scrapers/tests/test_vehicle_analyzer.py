@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testes do FuzzyMatcher (busca em lote x busca query a query)
+
+Ex (de dentro de scrapers/):
+    python -m unittest discover -s tests
+"""
+
+import random
+import unittest
+
+from vehicle_analyzer import FuzzyMatcher, np
+
+
+MODELS = ['UNO', 'GOL', 'ONIX', 'KA', 'CORSA', 'STRADA', 'HILUX', 'RANGER', 'S10', 'CG', 'BIZ', 'FAN', 'CB', 'XTZ']
+VERSIONS = ['VIVACE', 'SEDAN', 'HATCH', 'SRV', 'XLT', 'LTZ', 'TITAN', 'START', 'EX', 'FLEX', 'ENDURANCE', 'LIFE']
+SPECS = ['1.0', '1.4', '1.6', '2.0', '2.8', '125', '150', '160', '250', '300', '4X2', '4X4', 'CD', 'CS', 'MT', 'AT']
+
+
+@unittest.skipIf(np is None, "NumPy não instalado")
+class FuzzyMatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(7)
+        catalog = set()
+        while len(catalog) < 5000:
+            words = [rng.choice(MODELS), rng.choice(VERSIONS)] + rng.sample(SPECS, rng.randint(1, 4))
+            catalog.add(' '.join(words))
+        self.catalog = sorted(catalog)
+
+        self.queries = []
+        for _ in range(400):
+            words = rng.choice(self.catalog).split()
+            rng.shuffle(words)
+            self.queries.append(' '.join(words[:rng.randint(2, len(words))]).lower())
+
+    def test_match_many_matches_match_on_a_large_catalog(self):
+        # top_k pequeno: a pré-seleção corta candidatos empatados em trigramas
+        for top_k in (4, 32):
+            matcher = FuzzyMatcher(self.catalog, top_k=top_k)
+
+            self.assertEqual(
+                matcher.match_many(self.queries, threshold=0.5, block_size=64),
+                [matcher.match(q, threshold=0.5) for q in self.queries]
+            )
+
+    def test_match_many_handles_queries_without_known_trigrams(self):
+        matcher = FuzzyMatcher(self.catalog)
+
+        self.assertEqual(matcher.match_many(['', 'ÇÇÇ', 'UNO VIVACE 1.0']), [
+            None, None, matcher.match('UNO VIVACE 1.0')
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,21 +5,112 @@ UPDATE VEHICLE TYPES
 Atualiza vehicle_type para registros existentes
 """
 
-import time
-import random
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 from market_price_supabase_client import MarketPriceSupabaseClient
-from vehicle_analyzer import VehicleAnalyzer
+from vehicle_analyzer import ImprovedVehicleAnalyzer
 
 
-def update_vehicle_types_batch(batch_size: int = 100, max_batches: int = 50):
-    """Atualiza vehicle_type em batches"""
+# Colunas usadas pelo analyzer
+VEHICLE_COLUMNS = 'id,title,normalized_title,description,metadata'
+
+# Analyzer de cada processo do pool (criado no initializer)
+_analyzer = None
+
+
+def _init_worker():
+    global _analyzer
+    _analyzer = ImprovedVehicleAnalyzer()
+
+
+def _classify(vehicle: Dict) -> Tuple[str, Optional[str], Optional[str]]:
+    """
+    Classifica um veículo (roda nos processos do pool)
+    
+    Returns:
+        (id, vehicle_type, erro)
+    """
+    try:
+        analysis = _analyzer.analyze(vehicle)
+        return vehicle.get('id'), analysis.get('vehicle_type'), None
+    except Exception as e:
+        return vehicle.get('id'), None, str(e)[:40]
+
+
+def _collect_vehicle_types(
+    vehicles: List[Dict],
+    results: List[Tuple[str, Optional[str], Optional[str]]],
+    pending: Dict[str, List[str]],
+    stats: Dict
+):
+    """Agrupa os IDs classificados por tipo (resultados na mesma ordem dos veículos)"""
+    for idx, (vehicle, (vehicle_id, vehicle_type, error)) in enumerate(zip(vehicles, results), 1):
+        title = (vehicle.get('title') or '')[:50]
+        
+        if error:
+            print(f"[{idx}/{len(vehicles)}] {title}... ❌ Erro: {error}")
+            stats['errors'] += 1
+        elif not vehicle_type:
+            print(f"[{idx}/{len(vehicles)}] {title}... ⚠️  Tipo não identificado")
+        else:
+            pending.setdefault(vehicle_type, []).append(vehicle_id)
+
+
+def _flush_vehicle_types(
+    client: MarketPriceSupabaseClient,
+    pending: Dict[str, List[str]],
+    stats: Dict,
+    chunk_size: int,
+    force: bool = False
+):
+    """
+    Grava os grupos pendentes (um PATCH `id=in.(...)` por tipo)
+    
+    Sem `force`, só grava chunks completos; o resto espera os próximos batches.
+    """
+    for vehicle_type, ids in pending.items():
+        size = len(ids) if force else len(ids) - len(ids) % chunk_size
+        if not size:
+            continue
+        
+        result = client.bulk_update_vehicle_type('veiculos', vehicle_type, ids[:size], chunk_size)
+        del ids[:size]
+        
+        print(f"   💾 {vehicle_type}: {result['success']} atualizados")
+        
+        stats['updated'] += result['success']
+        stats['errors'] += result['errors']
+        stats['by_type'][vehicle_type] = stats['by_type'].get(vehicle_type, 0) + result['success']
+
+
+def update_vehicle_types_batch(
+    batch_size: int = 100,
+    max_batches: int = 50,
+    workers: Optional[int] = None,
+    chunk_size: int = 200
+):
+    """
+    Atualiza vehicle_type em batches
+    
+    Só busca veículos sem tipo (`vehicle_type=is.null` no servidor). A
+    classificação (CPU pura) roda em um pool de processos e os IDs são
+    agrupados por tipo: cada gravação é um PATCH `id=in.(...)` com até
+    `chunk_size` veículos do mesmo tipo.
+    
+    Args:
+        batch_size: Registros por página
+        max_batches: Máximo de páginas
+        workers: Processos do pool (padrão: número de CPUs)
+        chunk_size: IDs por PATCH
+    """
     print("="*60)
     print("🔄 ATUALIZAR VEHICLE_TYPE - VEÍCULOS EXISTENTES")
     print("="*60)
     
     client = MarketPriceSupabaseClient()
-    analyzer = VehicleAnalyzer()
+    workers = workers or os.cpu_count() or 1
     
     stats = {
         'processed': 0,
@@ -28,97 +119,49 @@ def update_vehicle_types_batch(batch_size: int = 100, max_batches: int = 50):
         'by_type': {}
     }
     
-    offset = 0
+    # IDs classificados aguardando gravação, por tipo
+    pending: Dict[str, List[str]] = {}
+    
+    # Stream por keyset: a próxima página é buscada enquanto a atual é processada.
+    # Veículos gravados continuam com o mesmo (created_at, id), então o cursor
+    # não pula nem repete linhas mesmo com o filtro is.null.
+    pages = client.stream_vehicles(
+        'veiculos',
+        filters={'vehicle_type': 'is.null'},
+        columns=VEHICLE_COLUMNS,
+        page_size=batch_size
+    )
     batch_num = 0
     
-    while batch_num < max_batches:
-        print(f"\n{'='*60}")
-        print(f"📦 BATCH {batch_num + 1} (offset: {offset})")
-        print(f"{'='*60}")
-        
-        # Busca veículos ativos (independente de market_price)
-        try:
-            url = f"{client.url}/rest/v1/veiculos"
-            params = {
-                'select': 'id,title,normalized_title,description,metadata,vehicle_type',
-                'is_active': 'eq.true',
-                'limit': batch_size,
-                'offset': offset,
-                'order': 'created_at.desc'
-            }
-            
-            r = client.session.get(url, params=params, timeout=30)
-            
-            if r.status_code != 200:
-                print(f"❌ Erro ao buscar: {r.status_code}")
-                break
-            
-            vehicles = r.json()
-            
-            if not vehicles:
-                print("✅ Fim dos registros")
-                break
-            
-            print(f"📋 {len(vehicles)} veículos carregados\n")
-            
-            # Processa cada veículo
-            for idx, vehicle in enumerate(vehicles, 1):
-                stats['processed'] += 1
-                vehicle_id = vehicle.get('id')
-                current_type = vehicle.get('vehicle_type')
-                title = vehicle.get('title', '')[:50]
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for vehicles in pages:
+                batch_num += 1
+                stats['processed'] += len(vehicles)
                 
-                # Pula se já tem tipo
-                if current_type:
-                    continue
+                print(f"\n{'='*60}")
+                print(f"📦 BATCH {batch_num}")
+                print(f"{'='*60}")
+                print(f"📋 {len(vehicles)} veículos carregados\n")
                 
-                print(f"[{idx}/{len(vehicles)}] {title}...")
+                chunksize = max(1, len(vehicles) // (workers * 4))
+                results = list(pool.map(_classify, vehicles, chunksize=chunksize))
                 
-                try:
-                    # Analisa veículo
-                    analysis = analyzer.analyze(vehicle)
-                    vehicle_type = analysis.get('vehicle_type')
-                    
-                    if vehicle_type:
-                        # Atualiza apenas vehicle_type
-                        update_url = f"{client.url}/rest/v1/veiculos"
-                        update_data = {'vehicle_type': vehicle_type}
-                        update_params = {'id': f'eq.{vehicle_id}'}
-                        
-                        r_update = client.session.patch(
-                            update_url,
-                            json=update_data,
-                            params=update_params,
-                            timeout=30
-                        )
-                        
-                        if r_update.status_code in (200, 204):
-                            print(f"   ✅ {vehicle_type}")
-                            stats['updated'] += 1
-                            stats['by_type'][vehicle_type] = stats['by_type'].get(vehicle_type, 0) + 1
-                        else:
-                            print(f"   ❌ Erro: {r_update.status_code}")
-                            stats['errors'] += 1
-                    else:
-                        print(f"   ⚠️  Tipo não identificado")
+                _collect_vehicle_types(vehicles, results, pending, stats)
+                _flush_vehicle_types(client, pending, stats, chunk_size)
                 
-                except Exception as e:
-                    print(f"   ❌ Erro: {str(e)[:40]}")
-                    stats['errors'] += 1
-                
-                # Delay
-                time.sleep(random.uniform(0.1, 0.3))
-            
-        except Exception as e:
-            print(f"❌ Erro no batch: {e}")
-            break
-        
-        offset += batch_size
-        batch_num += 1
-        
-        # Delay entre batches
-        if batch_num < max_batches:
-            time.sleep(2)
+                if batch_num >= max_batches:
+                    break
+    
+    except Exception as e:
+        print(f"❌ Erro no batch: {e}")
+    
+    # Grava os grupos incompletos
+    _flush_vehicle_types(client, pending, stats, chunk_size, force=True)
+    client.close()
+    
+    if batch_num == 0:
+        print("✅ Fim dos registros")
     
     # Resumo
     print(f"\n{'='*60}")
@@ -142,6 +185,10 @@ if __name__ == "__main__":
     print("="*60)
     
     # Atualiza até 50 batches de 100 (5000 total)
-    update_vehicle_types_batch(batch_size=100, max_batches=50)
+    update_vehicle_types_batch(
+        batch_size=100,
+        max_batches=50,
+        workers=int(os.getenv('ANALYZER_WORKERS', '0')) or None
+    )
     
     print(f"\n📅 Término: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
\ No newline at end of file
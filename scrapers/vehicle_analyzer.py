@@ -6,9 +6,296 @@ Sistema inteligente de busca na FIPE com múltiplas estratégias de fallback
 """
 
 import re
+import math
+from functools import lru_cache
 from typing import Dict, Optional, List, Tuple
 from difflib import SequenceMatcher
 
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: só acelera o fuzzy_match_batch
+    np = None
+
+
+# Regexes de limpeza para comparação (compiladas uma única vez)
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+_SPACES_RE = re.compile(r'\s+')
+
+
+def _clean_text(text: str) -> str:
+    """Limpa texto para comparação fuzzy"""
+    # Remove pontuação e caracteres especiais
+    clean = _PUNCTUATION_RE.sub('', text.upper())
+    # Remove espaços múltiplos
+    clean = _SPACES_RE.sub(' ', clean)
+    return clean.strip()
+
+
+def _fuzzy_score(query_clean: str, query_words: set, candidate_clean: str, candidate_words: set) -> float:
+    """Score do fuzzy_match: 70% SequenceMatcher + 30% palavras em comum"""
+    score = SequenceMatcher(None, query_clean, candidate_clean).ratio()
+    word_overlap = len(query_words & candidate_words) / max(len(query_words), 1)
+    return (score * 0.7) + (word_overlap * 0.3)
+
+
+def _ngrams(text: str, n: int = 3) -> set:
+    padded = f" {text} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class FuzzyMatcher:
+    """
+    Matcher reutilizável para uma lista fixa de candidatos (ex: modelos FIPE)
+    
+    Os candidatos são limpos e tokenizados uma única vez e indexados por
+    trigramas. Cada busca pré-seleciona os `top_k` candidatos com mais
+    trigramas em comum e só neles calcula o score completo do fuzzy_match.
+    """
+    
+    def __init__(self, candidates: List[str], top_k: int = 32):
+        self.candidates = list(candidates)
+        self.top_k = top_k
+        self._columns = None
+        
+        self.cleaned = [_clean_text(c) for c in self.candidates]
+        self.words = [set(c.split()) for c in self.cleaned]
+        self.gram_counts = []
+        self.postings: Dict[str, List[int]] = {}
+        
+        for idx, clean in enumerate(self.cleaned):
+            grams = _ngrams(clean)
+            self.gram_counts.append(len(grams))
+            
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(idx)
+    
+    def __len__(self) -> int:
+        return len(self.candidates)
+    
+    def shortlist(self, query_clean: str) -> List[int]:
+        """Índices dos candidatos mais próximos por trigramas (ordem original)"""
+        query_grams = _ngrams(query_clean)
+        shared: Dict[int, int] = {}
+        
+        for gram in query_grams:
+            for idx in self.postings.get(gram, ()):
+                shared[idx] = shared.get(idx, 0) + 1
+        
+        if len(shared) > self.top_k:
+            norm = math.sqrt(max(len(query_grams), 1))
+            ranked = sorted(
+                shared,
+                key=lambda idx: (-shared[idx] / (norm * math.sqrt(self.gram_counts[idx])), idx)
+            )
+            shared = dict.fromkeys(ranked[:self.top_k])
+        
+        return sorted(shared)
+    
+    def match(self, query: str, threshold: float = 0.8) -> Optional[Tuple[str, float]]:
+        """
+        Melhor candidato para `query` (mesmo score e threshold do fuzzy_match)
+        
+        Returns:
+            (melhor_candidato, score) ou None
+        """
+        query_clean = _clean_text(query)
+        query_words = set(query_clean.split())
+        
+        best_match = None
+        best_score = 0.0
+        
+        for idx in self.shortlist(query_clean):
+            final_score = _fuzzy_score(query_clean, query_words, self.cleaned[idx], self.words[idx])
+            
+            if final_score > best_score:
+                best_score = final_score
+                best_match = self.candidates[idx]
+        
+        if best_score >= threshold:
+            return (best_match, best_score)
+        
+        return None
+    
+    def _build_columns(self):
+        """
+        Matriz esparsa candidatos x trigramas em formato CSC (uma coluna por
+        trigrama do catálogo): `indptr[j]:indptr[j+1]` delimita, em `rows`,
+        os candidatos que contêm o trigrama `j`
+        """
+        vocab = {gram: col for col, gram in enumerate(self.postings)}
+        lengths = np.fromiter((len(rows) for rows in self.postings.values()), dtype=np.int64, count=len(vocab))
+        
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        rows = np.fromiter(
+            (idx for idxs in self.postings.values() for idx in idxs),
+            dtype=np.int64,
+            count=int(indptr[-1])
+        )
+        norms = np.sqrt(np.asarray(self.gram_counts, dtype=np.float64))
+        
+        return vocab, indptr, rows, norms
+    
+    def _shared_grams(self, block: List[str]):
+        """
+        Trigramas em comum entre cada query do bloco e cada candidato
+        (produto esparso query CSR x candidatos CSC, acumulado com bincount)
+        
+        Returns:
+            (matriz densa len(block) x len(candidates), quantidade de trigramas de cada query)
+        """
+        vocab, indptr, rows, _ = self._columns
+        n = len(self.candidates)
+        
+        query_rows = []
+        query_cols = []
+        sizes = []
+        
+        for row, query_clean in enumerate(block):
+            grams = _ngrams(query_clean)
+            sizes.append(len(grams))
+            
+            for gram in grams:
+                col = vocab.get(gram)
+                if col is not None:
+                    query_rows.append(row)
+                    query_cols.append(col)
+        
+        query_rows = np.asarray(query_rows, dtype=np.int64)
+        query_cols = np.asarray(query_cols, dtype=np.int64)
+        
+        # Concatena, por entrada não nula da query, a coluna correspondente dos candidatos
+        starts = indptr[query_cols]
+        lengths = indptr[query_cols + 1] - starts
+        offsets = np.arange(int(lengths.sum()), dtype=np.int64) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        candidates = rows[np.repeat(starts, lengths) + offsets]
+        
+        flat = np.repeat(query_rows, lengths) * n + candidates
+        shared = np.bincount(flat, minlength=len(block) * n).reshape(len(block), n)
+        
+        return shared, sizes
+    
+    def match_many(
+        self,
+        queries: List[str],
+        threshold: float = 0.8,
+        block_size: int = 256
+    ) -> List[Optional[Tuple[str, float]]]:
+        """
+        Melhor candidato para cada query, em lote
+        
+        Com NumPy, os trigramas em comum entre todas as queries do bloco e
+        todos os candidatos saem de um produto de matrizes esparsas (vocabulário
+        exato, sem hashing); a pré-seleção dos `top_k` usa o mesmo cosseno e o
+        mesmo desempate de `shortlist`, então o resultado é o de `match`. Sem
+        NumPy, cai para `match` query a query.
+        
+        Returns:
+            Lista alinhada com `queries` de (melhor_candidato, score) ou None
+        """
+        if np is None or not self.candidates:
+            return [self.match(q, threshold) if self.candidates else None for q in queries]
+        
+        if self._columns is None:
+            self._columns = self._build_columns()
+        
+        norms = self._columns[3]
+        
+        # Queries repetidas são resolvidas uma única vez
+        unique = list(dict.fromkeys(_clean_text(q) for q in queries))
+        resolved: Dict[str, Optional[Tuple[str, float]]] = {}
+        
+        for start in range(0, len(unique), block_size):
+            block = unique[start:start + block_size]
+            shared, sizes = self._shared_grams(block)
+            
+            for row, query_clean in enumerate(block):
+                query_words = set(query_clean.split())
+                best_match = None
+                best_score = 0.0
+                
+                shortlist = np.flatnonzero(shared[row])
+                if len(shortlist) > self.top_k:
+                    cosine = shared[row, shortlist] / (math.sqrt(max(sizes[row], 1)) * norms[shortlist])
+                    shortlist = np.sort(shortlist[np.lexsort((shortlist, -cosine))[:self.top_k]])
+                
+                for idx in shortlist.tolist():
+                    final_score = _fuzzy_score(query_clean, query_words, self.cleaned[idx], self.words[idx])
+                    
+                    if final_score > best_score:
+                        best_score = final_score
+                        best_match = self.candidates[idx]
+                
+                resolved[query_clean] = (best_match, best_score) if best_score >= threshold else None
+        
+        return [resolved[_clean_text(q)] for q in queries]
+
+
+class RegexRuleChain:
+    """
+    Regras regex aplicadas em sequência (pattern.sub na ordem declarada)
+    
+    Uma alternação com um grupo nomeado por regra acha a primeira regra,
+    na ordem, que casa com o texto atual; só ela é aplicada, e a busca
+    continua a partir da regra seguinte sobre o texto já alterado. As regras
+    puladas não casam com o texto naquele ponto (o sub seria identidade),
+    então o resultado é o mesmo da cadeia sequencial, inclusive quando uma
+    regra casa com o texto produzido por outra anterior.
+    """
+    
+    def __init__(self, rules: Dict[str, str], flags: int = re.IGNORECASE):
+        self.patterns = list(rules)
+        self.flags = flags
+        self.compiled = [
+            (re.compile(pattern, flags), repl)
+            for pattern, repl in rules.items()
+        ]
+        
+        # primeira regra -> alternação das regras a partir dela
+        self._alternations: List[Optional[re.Pattern]] = [None] * len(self.compiled)
+    
+    def _alternation(self, lo: int) -> re.Pattern:
+        alternation = self._alternations[lo]
+        
+        if alternation is None:
+            alternation = re.compile(
+                '|'.join(f'(?P<r{i}>{self.patterns[i]})' for i in range(lo, len(self.patterns))),
+                self.flags
+            )
+            self._alternations[lo] = alternation
+        
+        return alternation
+    
+    def next_rule(self, text: str, lo: int = 0) -> Optional[int]:
+        """Índice da primeira regra a partir de `lo` que casa com `text` (ou None)"""
+        if lo >= len(self.compiled):
+            return None
+        
+        match = self._alternation(lo).search(text)
+        if not match:
+            return None
+        
+        found = int(match.lastgroup[1:])
+        
+        # Nenhuma regra casa antes do match e, no ponto do match, as anteriores
+        # à vencedora falham (a alternação tenta na ordem): só podem casar depois
+        for rule in range(lo, found):
+            if self.compiled[rule][0].search(text, match.start() + 1):
+                return rule
+        
+        return found
+    
+    def apply(self, text: str) -> str:
+        """Mesmo resultado de aplicar todas as regras em sequência"""
+        rule = self.next_rule(text)
+        
+        while rule is not None:
+            pattern, repl = self.compiled[rule]
+            text = pattern.sub(repl, text)
+            rule = self.next_rule(text, rule + 1)
+        
+        return text
+
 
 class FIPESmartSearcher:
     """Busca inteligente na FIPE com normalização e fallback strategies"""
@@ -59,46 +346,63 @@ class FIPESmartSearcher:
         r'STRADA\s+(HD|ENDURANCE)': r'STRADA \1',
     }
     
+    # Tamanho dos caches LRU de normalização
+    CACHE_SIZE = 65536
+    
     def __init__(self):
-        self.compiled_simplifications = [
-            (re.compile(pattern, re.IGNORECASE), repl) 
-            for pattern, repl in self.VERSION_SIMPLIFICATIONS.items()
-        ]
-        self.compiled_normalizations = [
-            (re.compile(pattern, re.IGNORECASE), repl)
-            for pattern, repl in self.MODEL_NORMALIZATIONS.items()
-        ]
+        # Só as regras que casam são aplicadas (ver RegexRuleChain)
+        self.simplifications = RegexRuleChain(self.VERSION_SIMPLIFICATIONS)
+        self.normalizations = RegexRuleChain(self.MODEL_NORMALIZATIONS)
+        self.compiled_simplifications = self.simplifications.compiled
+        self.compiled_normalizations = self.normalizations.compiled
+        
+        # Caches por instância das saídas normalizadas
+        self._normalize_model_cached = lru_cache(maxsize=self.CACHE_SIZE)(self._apply_normalizations)
+        self._simplify_version_cached = lru_cache(maxsize=self.CACHE_SIZE)(self._apply_simplifications)
+        self._clean_cached = lru_cache(maxsize=self.CACHE_SIZE)(_clean_text)
+        self._matcher_cached = lru_cache(maxsize=32)(FuzzyMatcher)
     
     def normalize_vehicle_name(self, brand: str, model: str, year: int) -> List[str]:
         """
         Gera múltiplas variações normalizadas do nome do veículo
         Retorna lista ordenada por probabilidade de sucesso
         """
-        variations = []
-        
         # 1. Normaliza marca
         brand_clean = self._normalize_brand(brand)
         
-        # 2. Normaliza modelo
+        # 2. Variações do modelo (da mais específica para a mais genérica)
+        return [
+            f"{brand_clean} {model_variation} {year}"
+            for model_variation in self.model_variations(model)
+        ]
+    
+    def model_variations(self, model: str) -> List[str]:
+        """
+        Variações normalizadas apenas do modelo (sem marca e ano)
+        Retorna lista ordenada por probabilidade de sucesso
+        """
+        variations = []
+        
+        # 1. Normaliza modelo
         model_clean = self._normalize_model(model)
         
-        # 3. Variação COMPLETA (como está)
-        variations.append(f"{brand_clean} {model_clean} {year}")
+        # 2. Variação COMPLETA (como está)
+        variations.append(model_clean)
         
-        # 4. Remove versões específicas
+        # 3. Remove versões específicas
         model_simple = self._simplify_version(model_clean)
         if model_simple != model_clean:
-            variations.append(f"{brand_clean} {model_simple} {year}")
+            variations.append(model_simple)
         
-        # 5. Apenas primeiras palavras do modelo (mais genérico)
+        # 4. Apenas primeiras palavras do modelo (mais genérico)
         model_words = model_simple.split()
         if len(model_words) > 2:
             model_basic = ' '.join(model_words[:2])
-            variations.append(f"{brand_clean} {model_basic} {year}")
+            variations.append(model_basic)
         
         if len(model_words) > 1:
             model_minimal = model_words[0]
-            variations.append(f"{brand_clean} {model_minimal} {year}")
+            variations.append(model_minimal)
         
         # Remove duplicatas mantendo ordem
         seen = set()
@@ -128,11 +432,13 @@ class FIPESmartSearcher:
     
     def _normalize_model(self, model: str) -> str:
         """Normaliza modelo aplicando regras conhecidas"""
+        return self._normalize_model_cached(model)
+    
+    def _apply_normalizations(self, model: str) -> str:
         model_clean = model.upper().strip()
         
         # Aplica normalizações específicas
-        for pattern, replacement in self.compiled_normalizations:
-            model_clean = pattern.sub(replacement, model_clean)
+        model_clean = self.normalizations.apply(model_clean)
         
         # Capitaliza corretamente
         model_clean = self._capitalize_model(model_clean)
@@ -141,12 +447,10 @@ class FIPESmartSearcher:
     
     def _simplify_version(self, model: str) -> str:
         """Remove versões e códigos específicos"""
-        simplified = model
-        
-        for pattern, replacement in self.compiled_simplifications:
-            simplified = pattern.sub(replacement, simplified)
-        
-        return simplified.strip()
+        return self._simplify_version_cached(model)
+    
+    def _apply_simplifications(self, model: str) -> str:
+        return self.simplifications.apply(model).strip()
     
     def _capitalize_model(self, model: str) -> str:
         """
@@ -167,43 +471,38 @@ class FIPESmartSearcher:
         """
         Encontra melhor match usando fuzzy matching
         Retorna (melhor_candidato, score) ou None
+        
+        O índice de cada lista de candidatos é reaproveitado entre chamadas.
         """
         if not candidates:
             return None
         
-        query_clean = self._clean_for_comparison(query)
-        best_match = None
-        best_score = 0.0
-        
-        for candidate in candidates:
-            candidate_clean = self._clean_for_comparison(candidate)
-            
-            # Calcula similaridade
-            score = SequenceMatcher(None, query_clean, candidate_clean).ratio()
-            
-            # Bônus se palavras-chave coincidem
-            query_words = set(query_clean.split())
-            candidate_words = set(candidate_clean.split())
-            word_overlap = len(query_words & candidate_words) / max(len(query_words), 1)
-            
-            final_score = (score * 0.7) + (word_overlap * 0.3)
-            
-            if final_score > best_score:
-                best_score = final_score
-                best_match = candidate
+        return self.build_matcher(candidates).match(query, threshold)
+    
+    def fuzzy_match_batch(
+        self,
+        queries: List[str],
+        candidates: List[str],
+        threshold: float = 0.8
+    ) -> List[Optional[Tuple[str, float]]]:
+        """
+        fuzzy_match para várias queries contra a mesma lista de candidatos
         
-        if best_score >= threshold:
-            return (best_match, best_score)
+        Returns:
+            Lista alinhada com `queries` de (melhor_candidato, score) ou None
+        """
+        if not candidates:
+            return [None] * len(queries)
         
-        return None
+        return self.build_matcher(candidates).match_many(queries, threshold)
+    
+    def build_matcher(self, candidates: List[str]) -> FuzzyMatcher:
+        """FuzzyMatcher da lista de candidatos (cacheado por conteúdo)"""
+        return self._matcher_cached(tuple(candidates))
     
     def _clean_for_comparison(self, text: str) -> str:
         """Limpa texto para comparação fuzzy"""
-        # Remove pontuação e caracteres especiais
-        clean = re.sub(r'[^\w\s]', '', text.upper())
-        # Remove espaços múltiplos
-        clean = re.sub(r'\s+', ' ', clean)
-        return clean.strip()
+        return self._clean_cached(text)
     
     def search_with_fallback(self, brand: str, model: str, year: int, 
                            fipe_search_func) -> Optional[Dict]:
@@ -236,6 +535,149 @@ class FIPESmartSearcher:
         
         print(f"      ❌ Nenhuma variação encontrou resultado")
         return None
+    
+    def search_in_catalog(
+        self,
+        model: str,
+        candidates: List[str],
+        threshold: float = 0.75
+    ) -> Optional[Dict]:
+        """
+        Avalia todas as variações do modelo contra uma lista já baixada
+        (ex: modelos FIPE da marca): primeiro busca exata, depois fuzzy
+        
+        Returns:
+            {'label': str, 'index': int, 'score': float, 'variation': str} ou None
+        """
+        if not candidates:
+            return None
+        
+        variations = self.model_variations(model)
+        matcher = self.build_matcher(candidates)
+        
+        # 1. Busca exata (após limpeza) em ordem de variação
+        exact = {}
+        for idx, clean in enumerate(matcher.cleaned):
+            exact.setdefault(clean, idx)
+        
+        for variation in variations:
+            idx = exact.get(self._clean_for_comparison(variation))
+            if idx is not None:
+                return {'label': candidates[idx], 'index': idx, 'score': 1.0, 'variation': variation}
+        
+        # 2. Fuzzy: melhor score entre todas as variações
+        best = None
+        for variation in variations:
+            match = matcher.match(variation, threshold)
+            if match and (best is None or match[1] > best['score']):
+                best = {
+                    'label': match[0],
+                    'index': candidates.index(match[0]),
+                    'score': match[1],
+                    'variation': variation
+                }
+        
+        return best
+    
+    def search_with_catalog(
+        self,
+        brand: str,
+        model: str,
+        year: int,
+        fetch_models_func,
+        threshold: float = 0.75
+    ) -> Optional[Dict]:
+        """
+        Fallback que baixa a lista de modelos da marca uma única vez e
+        avalia todas as variações localmente
+        
+        Args:
+            brand: Marca do veículo
+            model: Modelo do veículo
+            year: Ano do veículo
+            fetch_models_func: Função que recebe (marca normalizada) e retorna lista de labels
+            threshold: Score mínimo do fuzzy
+            
+        Returns:
+            Melhor match ({'label', 'index', 'score', 'variation'}) ou None
+        """
+        candidates = fetch_models_func(self._normalize_brand(brand)) or []
+        
+        print(f"   🔍 {len(self.model_variations(model))} variações contra {len(candidates)} modelos")
+        
+        match = self.search_in_catalog(model, candidates, threshold)
+        
+        if match:
+            print(f"      ✅ {match['label']} ({match['score']:.0%}, variação \"{match['variation']}\")")
+        else:
+            print(f"      ❌ Nenhuma variação encontrou resultado")
+        
+        return match
+
+
+class TitleAnalyzer:
+    """
+    Analyzer base: marca, modelo e ano a partir do título
+    
+    Ex: "HONDA CG 160 FAN 2023" -> HONDA / CG 160 FAN / 2023 (motos)
+    
+    O tipo vem do modelo (famílias conhecidas de motos e caminhões, para
+    marcas que fabricam mais de um tipo) e, se não reconhecido, da marca.
+    """
+    
+    MOTORCYCLE_BRANDS = {
+        'YAMAHA', 'KAWASAKI', 'DAFRA', 'SHINERAY', 'TRIUMPH', 'DUCATI',
+        'HARLEY-DAVIDSON', 'KTM', 'HAOJUE', 'TRAXX',
+    }
+    TRUCK_BRANDS = {'SCANIA', 'IVECO', 'DAF', 'AGRALE'}
+    
+    MOTORCYCLE_MODELS = re.compile(
+        r'^(CB|CG|BIZ|POP|FAN|TITAN|XRE|NXR|BROS|PCX|ELITE|YBR|YS|FZ|MT|XTZ|FAZER|FACTOR|'
+        r'LANDER|CROSSER|NMAX|NINJA|Z|INTRUDER|YES|BURGMAN|GSX|V-STROM)(\d|\b)'
+    )
+    TRUCK_MODELS = re.compile(r'^(ACCELO|ATEGO|AXOR|ACTROS|CONSTELLATION|DELIVERY|CARGO|TECTOR|DAILY)\b')
+    
+    _YEAR_RE = re.compile(r'^(19|20)\d{2}$')
+    
+    def analyze(self, vehicle: Dict) -> Dict:
+        """
+        Returns:
+            {'brand', 'model', 'year_model', 'year', 'vehicle_type', 'confidence'}
+        """
+        title = (vehicle.get('title') or '').upper()
+        words = (vehicle.get('normalized_title') or title.replace(' - ', ' ')).upper().split()
+        
+        year = int(words.pop()) if words and self._YEAR_RE.match(words[-1]) else None
+        
+        # "marca - modelo": o título separa marcas compostas (ex: "land rover - evoque")
+        brand = title.split(' - ')[0].strip() if ' - ' in title else (words[0] if words else None)
+        brand_words = len(brand.split()) if brand else 0
+        model = ' '.join(words[brand_words:]) or None
+        
+        return {
+            'brand': brand or None,
+            'model': model,
+            'year_model': year,
+            'year': year,
+            'vehicle_type': self.vehicle_type(brand, model),
+            'confidence': 'high' if brand and model and year else 'low',
+        }
+    
+    def vehicle_type(self, brand: Optional[str], model: Optional[str]) -> Optional[str]:
+        """carros, motos ou caminhoes (None sem marca)"""
+        if not brand:
+            return None
+        
+        if model and self.MOTORCYCLE_MODELS.match(model):
+            return 'motos'
+        if model and self.TRUCK_MODELS.match(model):
+            return 'caminhoes'
+        if brand in self.MOTORCYCLE_BRANDS:
+            return 'motos'
+        if brand in self.TRUCK_BRANDS:
+            return 'caminhoes'
+        
+        return 'carros'
 
 
 class ImprovedVehicleAnalyzer:
@@ -243,10 +685,18 @@ class ImprovedVehicleAnalyzer:
     Analyzer melhorado que integra com FIPESmartSearcher
     """
     
-    def __init__(self):
-        self.base_analyzer = VehicleAnalyzer()  # Seu analyzer original
+    def __init__(self, base_analyzer=None):
+        """
+        Args:
+            base_analyzer: Objeto com analyze(vehicle) (padrão: TitleAnalyzer)
+        """
+        self.base_analyzer = base_analyzer or TitleAnalyzer()
         self.fipe_searcher = FIPESmartSearcher()
     
+    def analyze(self, vehicle: Dict) -> Dict:
+        """Marca, modelo, ano e tipo do veículo (analyzer base)"""
+        return self.base_analyzer.analyze(vehicle)
+    
     def analyze_for_fipe(self, vehicle: Dict) -> Dict:
         """Analisa veículo e prepara para busca FIPE"""
         # Usa analyzer base
@@ -287,6 +737,56 @@ class ImprovedVehicleAnalyzer:
             year=analysis['year_model'],
             fipe_search_func=fipe_api_func
         )
+    
+    def search_fipe_catalog(self, vehicle: Dict, fipe_api) -> Optional[Dict]:
+        """
+        Busca na FIPE avaliando as variações contra a lista de modelos da marca
+        
+        Uma única cadeia marca -> modelos -> anos -> preço, independente do
+        número de variações.
+        
+        Args:
+            vehicle: Registro do veículo
+            fipe_api: Instância de FipeAPI
+        """
+        analysis = self.analyze_for_fipe(vehicle)
+        
+        if not analysis['fipe_ready']:
+            print(f"   ⚠️  Dados insuficientes: {analysis}")
+            return None
+        
+        vehicle_type = analysis.get('vehicle_type')
+        brand = self.fipe_searcher._normalize_brand(analysis['brand'])
+        
+        brand_code = fipe_api.find_brand_code(brand, vehicle_type)
+        if not brand_code:
+            return None
+        
+        models = fipe_api.list_models(brand_code, vehicle_type)
+        
+        match = self.fipe_searcher.search_with_catalog(
+            brand=brand,
+            model=analysis['model'],
+            year=analysis['year_model'],
+            fetch_models_func=lambda _: [m['Label'] for m in models]
+        )
+        
+        if not match:
+            return None
+        
+        model_code = models[match['index']]['Value']
+        
+        year_code = fipe_api.find_year_code(brand_code, model_code, analysis['year_model'], vehicle_type)
+        if not year_code:
+            return None
+        
+        result = fipe_api.get_price(brand_code, model_code, year_code, vehicle_type)
+        
+        if result:
+            result['match_score'] = match['score']
+            result['match_variation'] = match['variation']
+        
+        return result
 
 
 # ============================================================================